@@ -5,9 +5,34 @@ Generators are imported lazily to avoid requiring the OpenAI SDK
 when only the schemas are needed.
 """
 
-from .schemas import Persona, RegistroVocalidad
+from .schemas import (
+    PERSONA_ADAPTER,
+    Persona,
+    PersonaBase,
+    PersonaNoVocal,
+    PersonaSchema,
+    PersonaUnion,
+    PersonaVocal,
+    RegistroVocalidad,
+    load_persona,
+    load_personas,
+)
 
-__all__ = ["Persona", "RegistroVocalidad", "PersonaGenerator", "generate_all", "PROMPTS"]
+__all__ = [
+    "Persona",
+    "PersonaBase",
+    "PersonaVocal",
+    "PersonaNoVocal",
+    "PersonaSchema",
+    "PersonaUnion",
+    "PERSONA_ADAPTER",
+    "RegistroVocalidad",
+    "load_persona",
+    "load_personas",
+    "PersonaGenerator",
+    "generate_all",
+    "PROMPTS",
+]
 
 
 def __getattr__(name):  # pragma: no cover - lazy import
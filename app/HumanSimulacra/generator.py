@@ -7,19 +7,38 @@ from __future__ import annotations
 
 import asyncio
 import json
-from dataclasses import dataclass
+import os
+import random
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Iterable
+from typing import AsyncIterator, Callable, Iterable
 
+import httpx
 from dotenv import load_dotenv
 from openai import APIError, AsyncOpenAI
 from pydantic import ValidationError
 
-from .schemas import Persona
+from .schemas import (
+    PERSONA_ADAPTER,
+    Persona,
+    PersonaBase,
+    PersonaSchema,
+    RegistroVocalidad,
+    validar_coherencia_vocalidad,
+)
 
 
 DEFAULT_MODEL = "gpt-4.1-mini"
-PERSONA_SCHEMA = Persona
+# Requested as the structured output: Persona's JSON schema without its Python
+# validator, so the SDK's parse is the only validation pass.
+PERSONA_SCHEMA = PersonaSchema
+BASE_BACKOFF = 0.2
+MAX_BACKOFF = 30.0
+# AIMD: one extra slot per this many consecutive successes; halve on HTTP 429.
+AIMD_INCREASE_EVERY = 16
+AIMD_MIN_CONCURRENCY = 2
 
 BASE_SYSTEM_PROMPT = """Eres un generador de datos sintéticos para simulaciones de atención al cliente de Kavak.
 Devuelves exclusivamente un JSON válido que cumpla exactamente con el esquema Persona documentado.
@@ -34,18 +53,27 @@ class PersonaPrompt:
 
     name: str
     instructions: str
+    _messages: list[dict[str, object]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Built once per archetype; the SDK only reads the payload, so it is shared.
+        object.__setattr__(
+            self,
+            "_messages",
+            [
+                {
+                    "role": "system",
+                    "content": [{"type": "input_text", "text": BASE_SYSTEM_PROMPT}],
+                },
+                {
+                    "role": "user",
+                    "content": [{"type": "input_text", "text": self.instructions}],
+                },
+            ],
+        )
 
     def build_messages(self) -> list[dict[str, object]]:
-        return [
-            {
-                "role": "system",
-                "content": [{"type": "input_text", "text": BASE_SYSTEM_PROMPT}],
-            },
-            {
-                "role": "user",
-                "content": [{"type": "input_text", "text": self.instructions}],
-            },
-        ]
+        return self._messages
 
 
 PROMPTS: dict[str, PersonaPrompt] = {
@@ -91,6 +119,48 @@ class PersonaGenerationError(Exception):
     """Raised when persona generation fails after retries."""
 
 
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _retry_after_seconds(exc: Exception) -> float:
+    """Read the server-suggested wait from rate-limit headers (0 if absent)."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return 0.0
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    reset = headers.get("x-ratelimit-reset-requests")
+    if reset:
+        return sum(float(value) * _DURATION_UNITS[unit] for value, unit in _DURATION_RE.findall(reset))
+    return 0.0
+
+
+def _backoff_delay(attempt: int, exc: Exception) -> float:
+    """Capped exponential backoff with full jitter, never shorter than Retry-After."""
+    jittered = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2**attempt))
+    return max(jittered, _retry_after_seconds(exc))
+
+
+def _construct_trusted(data: dict) -> Persona:
+    """
+    Build a Persona from a dict the SDK already checked against the JSON schema.
+
+    Field types are trusted, so pydantic validation is skipped; only the
+    cross-field vocal rules (not expressible in the schema) are re-checked.
+    """
+    historial = [RegistroVocalidad.model_construct(**item) for item in data.get("historial_vocalidad", [])]
+    persona = Persona.model_construct(**{**data, "historial_vocalidad": historial})
+    return validar_coherencia_vocalidad(persona)
+
+
 class PersonaGenerator:
     """Async persona generator leveraging OpenAI Responses API."""
 
@@ -99,49 +169,174 @@ class PersonaGenerator:
         model: str = DEFAULT_MODEL,
         concurrent_requests: int = 8,
         client_factory: Callable[[], AsyncOpenAI] | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        max_concurrent_requests: int | None = None,
     ) -> None:
         self.model = model
-        self.semaphore = asyncio.Semaphore(concurrent_requests)
-        self._client_factory = client_factory
-
-    def _client(self) -> AsyncOpenAI:
-        if not hasattr(self, "_client_instance"):
-            factory = self._client_factory or AsyncOpenAI
-            setattr(self, "_client_instance", factory())
-        return getattr(self, "_client_instance")
-
-    async def _generate_single(self, prompt: PersonaPrompt, retry: int = 3) -> Persona:
+        self._active = 0
+        self._cmax = concurrent_requests
+        # Ceiling for additive increase; defaults to the configured concurrency, so
+        # the controller only backs off on 429s and then recovers back up to it.
+        self._hard_max = max(concurrent_requests, max_concurrent_requests or concurrent_requests)
+        self._success_streak = 0
+        self._cond = asyncio.Condition()
+        # Built once up front so concurrent first requests can't race to create
+        # (and leak) separate clients and connection pools.
+        if client_factory is not None:
+            self._client = client_factory()
+        else:
+            self._client = AsyncOpenAI(http_client=http_client)
+        # Opt-in replay cache: personas stored under caller-supplied keys.
+        self._cache: dict[str, PersonaBase] = {}
+
+    @asynccontextmanager
+    async def _acquire_slot(self) -> AsyncIterator[None]:
+        """Hold one request slot; the limit (`_cmax`) can change while waiting."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._cmax)
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._cond.notify(1)
+
+    async def set_concurrency(self, n: int) -> None:
+        """Resize the number of in-flight requests without restarting the batch."""
+        async with self._cond:
+            self._cmax = max(1, n)
+            self._cond.notify_all()
+
+    async def _record_success(self) -> None:
+        """Additive increase: widen the limit after a streak of successful requests."""
+        async with self._cond:
+            self._success_streak += 1
+            if self._success_streak % AIMD_INCREASE_EVERY == 0 and self._cmax < self._hard_max:
+                self._cmax += 1
+                self._cond.notify_all()
+
+    async def _record_rate_limit(self) -> None:
+        """Multiplicative decrease: halve the limit when the API answers 429."""
+        async with self._cond:
+            self._success_streak = 0
+            self._cmax = max(min(AIMD_MIN_CONCURRENCY, self._hard_max), self._cmax // 2)
+
+    async def _generate_single(
+        self,
+        prompt: PersonaPrompt,
+        retry: int = 3,
+        cache_key: str | None = None,
+    ) -> PersonaBase:
+        if cache_key is not None and cache_key in self._cache:
+            return self._cache[cache_key]
         for attempt in range(1, retry + 1):
             try:
-                async with self.semaphore:
-                    client = self._client()
-                    response = await client.responses.parse(
+                async with self._acquire_slot():
+                    # Streaming keeps the connection active while tokens arrive and
+                    # releases the slot promptly if the task is cancelled mid-response.
+                    async with self._client.responses.stream(
                         model=self.model,
                         input=prompt.build_messages(),
-                        text_format=Persona
-                    )
+                        text_format=PERSONA_SCHEMA,
+                    ) as stream:
+                        response = await stream.get_final_response()
                 parsed = response.output_parsed
-                if isinstance(parsed, Persona):
-                    persona = parsed
+                # The SDK already validated its parse against the schema; only raw
+                # text gets a full validation pass here.
+                if isinstance(parsed, PersonaBase):
+                    persona = validar_coherencia_vocalidad(parsed)
+                elif isinstance(parsed, dict):
+                    persona = _construct_trusted(parsed)
                 elif isinstance(parsed, str):
-                    data = json.loads(parsed)
-                    persona = Persona.model_validate(data)
+                    persona = PERSONA_ADAPTER.validate_json(parsed)
                 else:
-                    persona = Persona.model_validate(parsed)
+                    persona = PERSONA_ADAPTER.validate_python(parsed)
+                if cache_key is not None:
+                    self._cache[cache_key] = persona
+                await self._record_success()
                 return persona
-            except (APIError, ValidationError, json.JSONDecodeError, KeyError, IndexError) as exc:
+            except (APIError, ValidationError, json.JSONDecodeError, KeyError, IndexError, ValueError) as exc:
+                if getattr(exc, "status_code", None) == 429:
+                    await self._record_rate_limit()
                 if attempt == retry:
                     raise PersonaGenerationError(str(exc)) from exc
-                await asyncio.sleep(2**attempt * 0.2)
+                delay = _backoff_delay(attempt, exc)
+            # Back off outside the slot so waiting retries don't hold capacity.
+            await asyncio.sleep(delay)
         raise PersonaGenerationError("Exhausted retries")
 
-    async def generate_batch(self, prompt_key: str, total: int) -> list[Persona]:
+    async def generate_batch_stream(
+        self,
+        prompt_key: str,
+        total: int,
+        cache_key: str | None = None,
+    ) -> AsyncIterator[PersonaBase]:
+        """
+        Yield personas as soon as each request completes.
+
+        With `cache_key`, the i-th persona is kept under "<cache_key>:<i>" and
+        replayed (no request) by later calls with the same key.
+        """
         prompt = PROMPTS[prompt_key]
-        tasks = [asyncio.create_task(self._generate_single(prompt)) for _ in range(total)]
-        personas: list[Persona] = []
-        for task in asyncio.as_completed(tasks):
-            personas.append(await task)
-        return personas
+        remaining = total
+        pending: set[asyncio.Task[PersonaBase]] = set()
+        try:
+            while remaining or pending:
+                # Only a small window of tasks exists at once (twice the request
+                # limit), so memory stays bounded no matter how large `total` is.
+                while remaining and len(pending) < 2 * self._cmax:
+                    key = None if cache_key is None else f"{cache_key}:{total - remaining}"
+                    pending.add(asyncio.create_task(self._generate_single(prompt, cache_key=key)))
+                    remaining -= 1
+                # Finished tasks leave `pending` here, so each persona is only
+                # referenced until the consumer drops it.
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_batch(
+        self,
+        prompt_key: str,
+        total: int,
+        cache_key: str | None = None,
+    ) -> list[PersonaBase]:
+        return [persona async for persona in self.generate_batch_stream(prompt_key, total, cache_key)]
+
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+
+def _write_persona(path: str, persona: PersonaBase) -> None:
+    # pydantic-core serializes straight to UTF-8 JSON; no intermediate dict and
+    # no buffered text-file layer on the way to disk.
+    data = memoryview(persona.model_dump_json(indent=2).encode("utf-8"))
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+async def _generate_archetype(
+    generator: PersonaGenerator,
+    out_root: Path,
+    prompt_key: str,
+    total: int,
+) -> None:
+    folder = out_root / prompt_key
+    folder.mkdir(parents=True, exist_ok=True)
+    prefix = os.path.join(os.fspath(folder), prompt_key)
+    idx = 0
+    async for persona in generator.generate_batch_stream(prompt_key, total):
+        idx += 1
+        # Disk writes run in a worker thread while pending requests keep flowing.
+        await asyncio.to_thread(_write_persona, f"{prefix}_{idx:04d}.json", persona)
+        del persona
 
 
 async def generate_all(
@@ -150,22 +345,34 @@ async def generate_all(
     prompts: Iterable[str] | None = None,
     model: str = DEFAULT_MODEL,
     concurrent_requests: int = 8,
+    max_concurrent_requests: int | None = None,
 ) -> None:
     """Generate personas for the given prompt keys and persist as JSON."""
     out_root = Path(output_root)
     out_root.mkdir(parents=True, exist_ok=True)
 
-    generator = PersonaGenerator(model=model, concurrent_requests=concurrent_requests)
+    # One keep-alive pool sized for the request fan-out, shared by every archetype.
+    pool_size = max(concurrent_requests, max_concurrent_requests or 0) * 2
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max(64, pool_size), max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+    generator = PersonaGenerator(
+        model=model,
+        concurrent_requests=concurrent_requests,
+        http_client=http_client,
+        max_concurrent_requests=max_concurrent_requests,
+    )
     targets = list(prompts) if prompts else list(PROMPTS.keys())
 
-    for prompt_key in targets:
-        personas = await generator.generate_batch(prompt_key, per_prompt)
-        folder = out_root / prompt_key
-        folder.mkdir(parents=True, exist_ok=True)
-        for idx, persona in enumerate(personas, start=1):
-            payload = persona.model_dump(mode="json")
-            with (folder / f"{prompt_key}_{idx:04d}.json").open("w", encoding="utf-8") as handle:
-                json.dump(payload, handle, ensure_ascii=False, indent=2)
+    try:
+        # Archetypes share the generator's request slots, so running them together
+        # keeps total concurrency bounded while one archetype's tail overlaps the next.
+        await asyncio.gather(
+            *(_generate_archetype(generator, out_root, prompt_key, per_prompt) for prompt_key in targets)
+        )
+    finally:
+        await http_client.aclose()
 
 
 def main() -> None:
@@ -176,6 +383,12 @@ def main() -> None:
     parser.add_argument("--per-type", type=int, default=250, help="Personas por tipo de prompt.")
     parser.add_argument("--model", default=DEFAULT_MODEL, help="Modelo Responses a utilizar.")
     parser.add_argument("--concurrency", type=int, default=8, help="Solicitudes simultáneas.")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Límite al que puede crecer la concurrencia adaptativa (por defecto --concurrency).",
+    )
     parser.add_argument(
         "--types",
         nargs="*",
@@ -192,6 +405,7 @@ def main() -> None:
             prompts=args.types,
             model=args.model,
             concurrent_requests=args.concurrency,
+            max_concurrent_requests=args.max_concurrency,
         )
     )
 
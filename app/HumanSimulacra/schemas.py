@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Literal
+from pathlib import Path
+from typing import Annotated, Iterable, Literal, Union
 
-from pydantic import BaseModel, Field, PositiveFloat, PositiveInt, model_validator
+from pydantic import BaseModel, ConfigDict, Field, PositiveFloat, PositiveInt, TypeAdapter, model_validator
 
 
 class RegistroVocalidad(BaseModel):
@@ -24,19 +25,8 @@ class RegistroVocalidad(BaseModel):
     )
 
 
-class Persona(BaseModel):
-    """
-    Persona utilizada para simulaciones de conversaciones con agentes de CX.
-
-    - `historia_oculta`: Detalles personales desconocidos por CX que explican motivaciones.
-    - `historia_revelada`: Informacion disponible en los sistemas de Kavak.
-    - `es_vocal`: Indica si CX tiene senales recientes del cliente.
-    - `satisfaccion`: Solo se conoce cuando la persona es vocal; en caso contrario debe ser `None`.
-    - `historial_vocalidad`: Interacciones visibles para CX (vacio si no es vocal).
-    - `problema`: Presente cuando la persona esta insatisfecha (puede ser `None` si no hay problema).
-    - `expectativa_solucion`: Deseo intimo de la persona para resolver la relacion con Kavak.
-    - `prompt_conversacional`: Instruccion final para role-play con un agente proactivo.
-    """
+class PersonaBase(BaseModel):
+    """Campos compartidos por todas las variantes de persona."""
 
     nombre: str = Field(description="Nombre de pila que usara la persona durante la simulacion.")
     edad: PositiveInt = Field(description="Edad aproximada de la persona.")
@@ -73,26 +63,104 @@ class Persona(BaseModel):
         description="Instruccion para que el modelo interprete a la persona frente al agente de CX.",
     )
 
+
+class Persona(PersonaBase):
+    """
+    Persona utilizada para simulaciones de conversaciones con agentes de CX.
+
+    - `historia_oculta`: Detalles personales desconocidos por CX que explican motivaciones.
+    - `historia_revelada`: Informacion disponible en los sistemas de Kavak.
+    - `es_vocal`: Indica si CX tiene senales recientes del cliente.
+    - `satisfaccion`: Solo se conoce cuando la persona es vocal; en caso contrario debe ser `None`.
+    - `historial_vocalidad`: Interacciones visibles para CX (vacio si no es vocal).
+    - `problema`: Presente cuando la persona esta insatisfecha (puede ser `None` si no hay problema).
+    - `expectativa_solucion`: Deseo intimo de la persona para resolver la relacion con Kavak.
+    - `prompt_conversacional`: Instruccion final para role-play con un agente proactivo.
+    """
+
     @model_validator(mode="after")
     def _validar_coherencia_vocalidad(self) -> "Persona":
-        if not self.es_vocal:
-            if self.satisfaccion is not None:
-                raise ValueError("La satisfaccion debe ser None cuando la persona no es vocal.")
-            if self.historial_vocalidad:
-                raise ValueError(
-                    "Una persona no vocal no debe tener historial de interacciones visibles."
-                )
-        else:
-            if self.satisfaccion is None:
-                raise ValueError(
-                    "Las personas vocales deben exponer explicitamente su estado de satisfaccion."
-                )
-            if not self.historial_vocalidad:
-                raise ValueError(
-                    "Las personas vocales requieren al menos un registro en el historial de vocalidad."
-                )
-            if self.satisfaccion == "Insatisfecho" and not self.problema:
-                raise ValueError(
-                    "Una persona vocal e insatisfecha debe describir su problema actual."
-                )
+        return validar_coherencia_vocalidad(self)
+
+
+class PersonaSchema(PersonaBase):
+    # Schema-only twin of `Persona` (same JSON schema, no Python validator) for
+    # structured outputs: the SDK's parse is then the only validation pass.
+    __doc__ = Persona.__doc__
+    model_config = ConfigDict(title="Persona")
+
+
+def validar_coherencia_vocalidad(persona: PersonaBase) -> PersonaBase:
+    """Cross-field vocal rules that the JSON schema cannot express; raises ValueError."""
+    if not persona.es_vocal:
+        if persona.satisfaccion is not None:
+            raise ValueError("La satisfaccion debe ser None cuando la persona no es vocal.")
+        if persona.historial_vocalidad:
+            raise ValueError(
+                "Una persona no vocal no debe tener historial de interacciones visibles."
+            )
+    else:
+        if persona.satisfaccion is None:
+            raise ValueError(
+                "Las personas vocales deben exponer explicitamente su estado de satisfaccion."
+            )
+        if not persona.historial_vocalidad:
+            raise ValueError(
+                "Las personas vocales requieren al menos un registro en el historial de vocalidad."
+            )
+        if persona.satisfaccion == "Insatisfecho" and not persona.problema:
+            raise ValueError(
+                "Una persona vocal e insatisfecha debe describir su problema actual."
+            )
+    return persona
+
+
+class PersonaVocal(PersonaBase):
+    """Persona vocal: satisfaccion e historial obligatorios, declarados en el esquema."""
+
+    es_vocal: Literal[True] = Field(description="Indica si existen senales directas recientes para CX.")
+    satisfaccion: Literal["Satisfecho", "Insatisfecho"] = Field(
+        description="Estado de satisfaccion conocido por CX.",
+    )
+    historial_vocalidad: list[RegistroVocalidad] = Field(
+        min_length=1,
+        description="Eventos reportados que sustentan la vocalidad de la persona.",
+    )
+
+    @model_validator(mode="after")
+    def _validar_problema(self) -> "PersonaVocal":
+        if self.satisfaccion == "Insatisfecho" and not self.problema:
+            raise ValueError(
+                "Una persona vocal e insatisfecha debe describir su problema actual."
+            )
         return self
+
+
+class PersonaNoVocal(PersonaBase):
+    """Persona no vocal: sin satisfaccion conocida ni historial visible."""
+
+    es_vocal: Literal[False] = Field(description="Indica si existen senales directas recientes para CX.")
+    satisfaccion: None = Field(
+        default=None,
+        description="Debe ser None porque CX no conoce la satisfaccion.",
+    )
+    historial_vocalidad: list[RegistroVocalidad] = Field(
+        max_length=0,
+        description="Vacio: una persona no vocal no tiene interacciones visibles.",
+    )
+
+
+# Validates the same rules as `Persona`, dispatching on `es_vocal` inside pydantic-core.
+PersonaUnion = Annotated[Union[PersonaVocal, PersonaNoVocal], Field(discriminator="es_vocal")]
+# Shared validator for `PersonaUnion`; build no other adapters (each compiles the schema again).
+PERSONA_ADAPTER = TypeAdapter(PersonaUnion)
+
+
+def load_persona(path: str | Path) -> PersonaBase:
+    """Decode and validate a persona JSON file in one pass (no intermediate dict)."""
+    return PERSONA_ADAPTER.validate_json(Path(path).read_bytes())
+
+
+def load_personas(paths: Iterable[str | Path]) -> list[PersonaBase]:
+    """Bulk variant of `load_persona` for replay and analytics loops."""
+    return [load_persona(path) for path in paths]
@@ -5,16 +5,35 @@ textual and JSON outputs used by demo agents.
 """
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import json
 import logging
 import os
+import random
+import threading
 import time
-from typing import Any, Callable, Dict, List, Optional
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, TypeVar
 
-from openai import OpenAI, APIError
+from openai import AsyncOpenAI, OpenAI, APIError
+from pydantic import BaseModel
 
 DEFAULT_RETRIES = 3
 DEFAULT_BACKOFF = 1.5
+MAX_BACKOFF = 30.0
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_CACHE_SIZE = 4096
+# Above this temperature responses are meant to vary, so they are never cached.
+CACHE_MAX_TEMPERATURE = 0.7
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+T = TypeVar("T")
+
+
+_NO = object()
 
 
 def _extract_text_from_response(response: Any) -> str:
@@ -22,17 +41,59 @@ def _extract_text_from_response(response: Any) -> str:
     Extract text from OpenAI Responses API response object.
     The response has structure: response.output[0].content[0].text
     """
-    if hasattr(response, 'output_text'):
-        # Fallback for older SDK versions
-        return response.output_text
+    text = getattr(response, "output_text", _NO)
+    if text is not _NO:
+        return text
+
+    try:
+        return response.output[0].content[0].text
+    except (AttributeError, IndexError, TypeError) as exc:
+        raise ValueError("Unable to extract text from response") from exc
+
+
+@functools.lru_cache(maxsize=None)
+def _get_client(api_key: str) -> OpenAI:
+    """One sync client (and connection pool) per API key, shared by all runners."""
+    return OpenAI(api_key=api_key)
+
 
-    # Extract from new structure
-    if response.output and len(response.output) > 0:
-        message = response.output[0]
-        if message.content and len(message.content) > 0:
-            return message.content[0].text
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
 
-    raise ValueError("Unable to extract text from response")
+
+def _get_async_client(api_key: str) -> AsyncOpenAI:
+    """
+    One async client per (running event loop, API key), shared by all runners.
+
+    httpx async pools are bound to the loop that opened them, so each loop
+    gets its own client; entries go away with the loop.
+    """
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return client
+
+
+async def aclose_async_clients() -> None:
+    """
+    Close the async clients opened on the running loop.
+
+    Await this before a short-lived loop (e.g. one `asyncio.run`) finishes, so
+    the clients' connection pools are shut down instead of dropped with it.
+    Clients injected through `async_client=` belong to the caller and are kept.
+    """
+    clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+def _parse_json_text(text: str) -> Dict[str, Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid JSON returned by model: {exc}") from exc
 
 
 def _build_content_block(text: str) -> Dict[str, Any]:
@@ -40,16 +101,105 @@ def _build_content_block(text: str) -> Dict[str, Any]:
     return {"type": "input_text", "text": text}
 
 
+@functools.lru_cache(maxsize=128)
+def _system_message(system_prompt: str) -> Dict[str, Any]:
+    """System message built once per prompt; shared read-only across requests."""
+    return {"role": "system", "content": [_build_content_block(system_prompt)]}
+
+
 logger = logging.getLogger(__name__)
 
 
+class LRUCache:
+    """
+    Thread-safe LRU mapping holding at most `maxsize` entries (0 disables it).
+
+    Runners and the judge each create one by default; pass the same instance
+    to several of them (or keep it across Streamlit reruns) to share results.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value (or None) and mark it as recently used."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used beyond `maxsize`."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute / 60` per second.
+
+    Holds at most one second's worth of tokens, so bursts stay short.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class _LoopResources(NamedTuple):
+    """Async state an `AgentsRunner` keeps per event loop."""
+
+    client: AsyncOpenAI
+    slots: asyncio.Semaphore
+    request_bucket: Optional[_TokenBucket]
+    token_bucket: Optional[_TokenBucket]
+
+
 class AgentsRunner:
     """
     Wrapper to interact with OpenAI Agents (Responses API).
 
     Provides helpers for:
-      * Free-form text generation (`run_text`)
-      * JSON-formatted outputs (`run_json`)
+      * Free-form text generation (`run_text` / `arun_text`)
+      * JSON-formatted outputs (`run_json` / `arun_json`)
+      * JSON validated into a pydantic model (`run_model` / `arun_model`)
+
+    Identical requests (same model, temperature and messages) are answered
+    from an in-memory LRU of up to `cache_size` responses, unless the
+    temperature is above `CACHE_MAX_TEMPERATURE`. Only replies that parsed
+    (as JSON or into the model) are cached.
+
+    The `a*` variants use `AsyncOpenAI` so many calls can be awaited together
+    (e.g. inside `asyncio.gather`); at most `max_concurrency` are in flight.
+    Optional `requests_per_minute` / `tokens_per_minute` budgets (the model's
+    RPM/TPM limits) throttle them with token buckets; tokens are estimated
+    from prompt length plus `max_output_tokens`.
     """
 
     def __init__(
@@ -61,12 +211,23 @@ class AgentsRunner:
         max_output_tokens: int = 512,
         max_retries: int = DEFAULT_RETRIES,
         backoff: float = DEFAULT_BACKOFF,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache: Optional[LRUCache] = None,
+        prompt_cache_key: Optional[str] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        client: Optional[OpenAI] = None,
+        async_client: Optional[AsyncOpenAI] = None,
     ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key required (set OPENAI_API_KEY or pass api_key).")
 
-        self.client = OpenAI(api_key=self.api_key)
+        # Clients (and their keep-alive connection pools) are shared across
+        # runners unless the caller injects its own.
+        self.client = client or _get_client(self.api_key)
+        self._shared_async_client = async_client
         if not hasattr(self.client, "responses"):
             raise AttributeError(
                 "OpenAI client is missing `responses`. "
@@ -77,6 +238,23 @@ class AgentsRunner:
         self.max_output_tokens = max_output_tokens
         self.max_retries = max_retries
         self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        # Routes requests sharing a static prefix to the same server-side prompt cache.
+        self.prompt_cache_key = prompt_cache_key
+
+        # LRU of raw response text keyed by request digest; 0 disables it.
+        # A caller-provided `cache` is shared as is (and sets the size).
+        self._cache = cache if cache is not None else LRUCache(cache_size)
+        self.cache_size = self._cache.maxsize
+
+        # Async client, slots and rate buckets are bound to an event loop; kept
+        # per loop so one runner can serve several threads' loops at once.
+        self._loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = (
+            weakref.WeakKeyDictionary()
+        )
 
     def run_text(
         self,
@@ -84,17 +262,20 @@ class AgentsRunner:
         system_prompt: str,
         user_content: str,
         extra_input: Optional[List[Dict[str, Any]]] = None,
+        max_output_tokens: Optional[int] = None,
     ) -> str:
         """
         Generate free-form text using the Agents Responses API.
+
+        `max_output_tokens` overrides the runner default for this call.
         """
-        response = self._create_response(
+        return self._fetch_text(
+            str.strip,
             system_prompt=system_prompt,
             user_content=user_content,
             extra_input=extra_input,
-            response_format=None,
+            max_output_tokens=max_output_tokens,
         )
-        return _extract_text_from_response(response).strip()
 
     def run_json(
         self,
@@ -106,83 +287,348 @@ class AgentsRunner:
         """
         Generate JSON output using the Agents Responses API.
         """
+        return self._fetch_text(
+            _parse_json_text,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+        )
+
+    def run_model(
+        self,
+        model_cls: Type[ModelT],
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]] = None,
+    ) -> ModelT:
+        """
+        Generate JSON output and validate it directly into `model_cls`.
+
+        Uses pydantic's single-pass `model_validate_json` instead of
+        `json.loads` followed by model construction.
+        """
+        return self._fetch_text(
+            model_cls.model_validate_json,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+        )
+
+    async def arun_text(
+        self,
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]] = None,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Async twin of `run_text`.
+        """
+        return await self._afetch_text(
+            str.strip,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+            max_output_tokens=max_output_tokens,
+        )
+
+    async def arun_json(
+        self,
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async twin of `run_json`.
+        """
+        return await self._afetch_text(
+            _parse_json_text,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+        )
+
+    async def arun_model(
+        self,
+        model_cls: Type[ModelT],
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]] = None,
+    ) -> ModelT:
+        """
+        Async twin of `run_model`.
+        """
+        return await self._afetch_text(
+            model_cls.model_validate_json,
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+        )
+
+    def _fetch_text(
+        self,
+        parse: Callable[[str], T],
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]],
+        max_output_tokens: Optional[int] = None,
+    ) -> T:
+        """
+        Return `parse(text)` of the response, serving repeated requests from the cache.
+
+        The text is cached only once `parse` succeeds, so a truncated or
+        malformed reply is retried on the next call instead of replayed.
+        """
+        key = self._cache_key(system_prompt, user_content, extra_input, max_output_tokens)
+        text = self._cache_get(key)
+        if text is not None:
+            return parse(text)
         response = self._create_response(
             system_prompt=system_prompt,
             user_content=user_content,
             extra_input=extra_input,
             response_format=None,
+            max_output_tokens=max_output_tokens,
         )
-        try:
-            return json.loads(_extract_text_from_response(response))
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"Invalid JSON returned by model: {exc}") from exc
+        text = _extract_text_from_response(response)
+        result = parse(text)
+        self._cache_put(key, text)
+        return result
 
-    def _create_response(
+    async def _afetch_text(
+        self,
+        parse: Callable[[str], T],
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]],
+        max_output_tokens: Optional[int] = None,
+    ) -> T:
+        """
+        Async version of `_fetch_text`.
+        """
+        key = self._cache_key(system_prompt, user_content, extra_input, max_output_tokens)
+        text = self._cache_get(key)
+        if text is not None:
+            return parse(text)
+        response = await self._acreate_response(
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+            response_format=None,
+            max_output_tokens=max_output_tokens,
+        )
+        text = _extract_text_from_response(response)
+        result = parse(text)
+        self._cache_put(key, text)
+        return result
+
+    def _cache_key(
+        self,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]],
+        max_output_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        if self.cache_size <= 0 or self.temperature > CACHE_MAX_TEMPERATURE:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        limit = repr(max_output_tokens or self.max_output_tokens)
+        for part in (self.model, repr(self.temperature), limit, system_prompt, user_content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        if extra_input:
+            digest.update(json.dumps(extra_input, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        return self._cache.get(key)
+
+    def _cache_put(self, key: Optional[str], text: str) -> None:
+        if key is None:
+            return
+        self._cache.put(key, text)
+
+    def _build_request(
         self,
         *,
         system_prompt: str,
         user_content: str,
         extra_input: Optional[List[Dict[str, Any]]],
         response_format: Optional[Dict[str, Any]],
-    ) -> Any:
+        max_output_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
-        Invoke OpenAI Responses API with retry and backoff policy.
+        Build the keyword arguments for `responses.create`.
         """
         messages: List[Dict[str, Any]] = [
-            {"role": "system", "content": [_build_content_block(system_prompt)]},
-            {"role": "user", "content": [_build_content_block(user_content)]},
+            _system_message(system_prompt),
+            {"role": "user", "content": [{"type": "input_text", "text": user_content}]},
         ]
-
         if extra_input:
-            messages.extend(extra_input)
+            messages += extra_input
+
+        kwargs: Dict[str, Any] = {
+            "model": self.model,
+            "input": messages,
+            "temperature": self.temperature,
+        }
+
+        max_output_tokens = max_output_tokens or self.max_output_tokens
+        if max_output_tokens:
+            kwargs["max_output_tokens"] = max_output_tokens
+
+        if self.prompt_cache_key:
+            kwargs["prompt_cache_key"] = self.prompt_cache_key
+
+        # Attach structured response directives when requested
+        if response_format:
+            kwargs["response_format"] = response_format
+
+        return kwargs
+
+    def _create_response(
+        self,
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]],
+        response_format: Optional[Dict[str, Any]],
+        max_output_tokens: Optional[int] = None,
+    ) -> Any:
+        """
+        Invoke OpenAI Responses API with retry and backoff policy.
+        """
+        kwargs = self._build_request(
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+            response_format=response_format,
+            max_output_tokens=max_output_tokens,
+        )
 
         last_exc: Optional[Exception] = None
         for attempt in range(1, self.max_retries + 1):
             try:
-                # Build kwargs for API call
-                kwargs: Dict[str, Any] = {
-                    "model": self.model,
-                    "input": messages,
-                    "temperature": self.temperature,
-                }
+                return self.client.responses.create(**kwargs)
+            except Exception as exc:  # broad catch: SDK raises various subclasses
+                last_exc = exc
+                self._log_failure(attempt, exc)
+                if attempt == self.max_retries:
+                    break
+                time.sleep(self._backoff_delay(attempt))
 
-                if self.max_output_tokens:
-                    kwargs["max_output_tokens"] = self.max_output_tokens
+        raise RuntimeError(
+            f"Agents API call failed after {self.max_retries} attempts: {last_exc}"
+        ) from last_exc
 
-                # Attach structured response directives when requested
-                if response_format:
-                    kwargs["response_format"] = response_format
+    async def _acreate_response(
+        self,
+        *,
+        system_prompt: str,
+        user_content: str,
+        extra_input: Optional[List[Dict[str, Any]]],
+        response_format: Optional[Dict[str, Any]],
+        max_output_tokens: Optional[int] = None,
+    ) -> Any:
+        """
+        Async version of `_create_response`; retries wait outside the slot.
+        """
+        kwargs = self._build_request(
+            system_prompt=system_prompt,
+            user_content=user_content,
+            extra_input=extra_input,
+            response_format=response_format,
+            max_output_tokens=max_output_tokens,
+        )
+        client, slots = self._async_resources()
 
-                return self.client.responses.create(**kwargs)
+        last_exc: Optional[Exception] = None
+        for attempt in range(1, self.max_retries + 1):
+            await self._throttle(system_prompt, user_content, kwargs.get("max_output_tokens"))
+            try:
+                async with slots:
+                    return await client.responses.create(**kwargs)
             except Exception as exc:  # broad catch: SDK raises various subclasses
                 last_exc = exc
-
-                status_code = getattr(exc, "status_code", None)
-                request_id = getattr(exc, "request_id", None)
-                error_payload = None
-                response_obj = getattr(exc, "response", None)
-                if response_obj is not None:
-                    try:
-                        error_payload = response_obj.json()
-                    except Exception:  # pragma: no cover - best effort
-                        error_payload = str(response_obj)
-
-                logger.warning(
-                    "Agents API call failed (attempt %d/%d, model=%s, status=%s, request_id=%s, error=%s)",
-                    attempt,
-                    self.max_retries,
-                    self.model,
-                    status_code,
-                    request_id,
-                    error_payload or exc,
-                )
+                self._log_failure(attempt, exc)
                 if attempt == self.max_retries:
                     break
-                time.sleep(self.backoff ** attempt)
+            await asyncio.sleep(self._backoff_delay(attempt))
 
         raise RuntimeError(
             f"Agents API call failed after {self.max_retries} attempts: {last_exc}"
         ) from last_exc
 
+    def _async_resources(self) -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+        """
+        Return the async client and concurrency slots for the running loop.
+        """
+        resources = self._current_loop_resources()
+        return resources.client, resources.slots
+
+    def _current_loop_resources(self) -> _LoopResources:
+        loop = asyncio.get_running_loop()
+        resources = self._loop_resources.get(loop)
+        if resources is None:
+            resources = _LoopResources(
+                client=self._shared_async_client or _get_async_client(self.api_key),
+                slots=asyncio.Semaphore(self.max_concurrency),
+                request_bucket=(
+                    _TokenBucket(self.requests_per_minute) if self.requests_per_minute else None
+                ),
+                token_bucket=(
+                    _TokenBucket(self.tokens_per_minute) if self.tokens_per_minute else None
+                ),
+            )
+            self._loop_resources[loop] = resources
+        return resources
+
+    async def _throttle(
+        self, system_prompt: str, user_content: str, max_output_tokens: Optional[int]
+    ) -> None:
+        """
+        Wait for RPM/TPM budget before sending a request (no-op when unset).
+        """
+        resources = self._current_loop_resources()
+        if resources.request_bucket is not None:
+            await resources.request_bucket.acquire()
+        if resources.token_bucket is not None:
+            # ~4 characters per token is close enough for rate budgeting.
+            estimate = (len(system_prompt) + len(user_content)) / 4 + (max_output_tokens or 0)
+            await resources.token_bucket.acquire(estimate)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps concurrent callers from retrying in lockstep.
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff ** attempt))
+
+    def _log_failure(self, attempt: int, exc: Exception) -> None:
+        status_code = getattr(exc, "status_code", None)
+        request_id = getattr(exc, "request_id", None)
+        error_payload = None
+        response_obj = getattr(exc, "response", None)
+        if response_obj is not None:
+            try:
+                error_payload = response_obj.json()
+            except Exception:  # pragma: no cover - best effort
+                error_payload = str(response_obj)
+
+        logger.warning(
+            "Agents API call failed (attempt %d/%d, model=%s, status=%s, request_id=%s, error=%s)",
+            attempt,
+            self.max_retries,
+            self.model,
+            status_code,
+            request_id,
+            error_payload or exc,
+        )
+
 
-__all__ = ["AgentsRunner"]
+__all__ = ["AgentsRunner", "LRUCache"]
@@ -2,9 +2,11 @@
 Judge: LLM-based evaluator using OpenAI Agents (Responses API).
 Returns structured scores for NPS, engagement, churn, and sentiment.
 """
-from typing import Optional
+import asyncio
+import hashlib
+from typing import List, Optional, Tuple
 
-from app.factories.agents_runner import AgentsRunner
+from app.factories.agents_runner import AgentsRunner, LRUCache
 from app.models import Context, Score
 
 
@@ -59,6 +61,23 @@ IMPORTANTE:
 - Valora claridad y acción concreta
 - Bonifica SLA específico cuando aplique
 - Ajusta expectativas según contexto (cliente vocal vs outreach)
+""".strip()
+
+# Sent as `prompt_cache_key` so every judge request reuses the cached prompt
+# prefix. Bump the version (judge-v2, ...) whenever the rubric above changes.
+JUDGE_PROMPT_CACHE_KEY = "judge-v1"
+
+# Verdicts kept per Judge; repeated (context, message) pairs skip the LLM call.
+JUDGE_CACHE_SIZE = 1024
+
+# Messages scored per request in `Judge.run_batch`.
+JUDGE_BATCH_SIZE = 8
+
+JUDGE_BATCH_INSTRUCTIONS = """
+Evalúa CADA elemento de forma independiente con los mismos criterios.
+Devuelve JSON ESTRICTO con esta estructura exacta:
+{"items": [{"id": <int>, <campos de la evaluación>}, ...]}
+Incluye exactamente un objeto por elemento, con el mismo "id".
 """
 
 
@@ -72,6 +91,8 @@ class Judge:
         temperature: float = 0.3,
         max_retries: int = 3,
         max_tokens: int = 500,
+        cache_size: int = JUDGE_CACHE_SIZE,
+        cache: Optional[LRUCache] = None,
     ):
         """
         Initialize Judge.
@@ -82,14 +103,33 @@ class Judge:
             temperature: Sampling temperature
             max_retries: Number of retries for failed requests
             max_tokens: Maximum output tokens for evaluation
+            cache_size: Max cached verdicts (0 disables the cache)
+            cache: Verdict cache to share (e.g. across Judge instances); its
+                size overrides `cache_size`
         """
+        # The verdict cache below is the only cache: the runners keep no
+        # response text of their own.
         self.runner = AgentsRunner(
             api_key=api_key,
             model=model,
             temperature=temperature,
             max_output_tokens=max_tokens,
             max_retries=max_retries,
+            cache_size=0,
+            prompt_cache_key=JUDGE_PROMPT_CACHE_KEY,
         )
+        # Same client and settings, with room for a full batch of verdicts.
+        self.batch_runner = AgentsRunner(
+            api_key=api_key,
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_tokens * JUDGE_BATCH_SIZE,
+            max_retries=max_retries,
+            cache_size=0,
+            prompt_cache_key=JUDGE_PROMPT_CACHE_KEY,
+        )
+        self._cache = cache if cache is not None else LRUCache(cache_size)
+        self.cache_size = self._cache.maxsize
 
     def run(self, context: Context, message: str) -> Score:
         """
@@ -104,16 +144,171 @@ class Judge:
         """
         user_prompt = self._build_prompt(context, message)
 
+        # The prompt embeds every context field plus the message, so its digest
+        # identifies the verdict exactly.
+        key = hashlib.sha256(user_prompt.encode("utf-8")).digest()
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
         try:
-            score_dict = self.runner.run_json(
+            score = self.runner.run_model(
+                Score,
                 system_prompt=JUDGE_SYSTEM_PROMPT,
                 user_content=user_prompt,
             )
-            return Score(**score_dict)
         except Exception as exc:
             print(f"Judge evaluation failed: {exc}")
             return self._default_score()
 
+        self._cache_put(key, score)
+        return score
+
+    async def arun(self, context: Context, message: str) -> Score:
+        """
+        Async twin of `run` (shares its verdict cache).
+        """
+        user_prompt = self._build_prompt(context, message)
+        key = hashlib.sha256(user_prompt.encode("utf-8")).digest()
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            score = await self.runner.arun_model(
+                Score,
+                system_prompt=JUDGE_SYSTEM_PROMPT,
+                user_content=user_prompt,
+            )
+        except Exception as exc:
+            print(f"Judge evaluation failed: {exc}")
+            return self._default_score()
+
+        self._cache_put(key, score)
+        return score
+
+    def run_batch(self, pairs: List[Tuple[Context, str]]) -> List[Score]:
+        """
+        Evaluate many (context, message) pairs with one request per batch.
+
+        Pairs are sent `JUDGE_BATCH_SIZE` at a time under the unchanged judge
+        system prompt; cached verdicts are reused and any item the model fails
+        to return falls back to `run`.
+
+        Args:
+            pairs: (context, message) tuples to evaluate
+
+        Returns:
+            Scores aligned with `pairs`
+        """
+        scores, pending = self._lookup_batch(pairs)
+
+        for start in range(0, len(pending), JUDGE_BATCH_SIZE):
+            batch = pending[start:start + JUDGE_BATCH_SIZE]
+            for (i, key, _), score in zip(batch, self._score_batch(batch)):
+                if score is None:
+                    score = self.run(*pairs[i])
+                else:
+                    self._cache_put(key, score)
+                scores[i] = score
+
+        return scores
+
+    async def arun_batch(self, pairs: List[Tuple[Context, str]]) -> List[Score]:
+        """
+        Async twin of `run_batch`; all batches are requested concurrently.
+        """
+        scores, pending = self._lookup_batch(pairs)
+        batches = [
+            pending[start:start + JUDGE_BATCH_SIZE]
+            for start in range(0, len(pending), JUDGE_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(self._ascore_batch(batch) for batch in batches))
+
+        missing: List[int] = []
+        for batch, batch_scores in zip(batches, results):
+            for (i, key, _), score in zip(batch, batch_scores):
+                if score is None:
+                    missing.append(i)
+                else:
+                    self._cache_put(key, score)
+                    scores[i] = score
+
+        retried = await asyncio.gather(*(self.arun(*pairs[i]) for i in missing))
+        for i, score in zip(missing, retried):
+            scores[i] = score
+
+        return scores
+
+    def _lookup_batch(
+        self, pairs: List[Tuple[Context, str]]
+    ) -> Tuple[List[Optional[Score]], List[Tuple[int, bytes, str]]]:
+        """Cached verdicts aligned with `pairs`, plus (index, key, prompt) of the rest."""
+        scores: List[Optional[Score]] = [None] * len(pairs)
+        pending: List[Tuple[int, bytes, str]] = []
+        for i, (context, message) in enumerate(pairs):
+            user_prompt = self._build_prompt(context, message)
+            key = hashlib.sha256(user_prompt.encode("utf-8")).digest()
+            scores[i] = self._cache_get(key)
+            if scores[i] is None:
+                pending.append((i, key, user_prompt))
+        return scores, pending
+
+    def _score_batch(self, batch: List[Tuple[int, bytes, str]]) -> List[Optional[Score]]:
+        """Score one batch in a single request; None marks items to retry alone."""
+        try:
+            payload = self.batch_runner.run_json(
+                system_prompt=JUDGE_SYSTEM_PROMPT,
+                user_content=self._batch_prompt(batch),
+            )
+        except Exception as exc:
+            print(f"Judge batch evaluation failed: {exc}")
+            return [None] * len(batch)
+        return self._parse_batch(payload, len(batch))
+
+    async def _ascore_batch(self, batch: List[Tuple[int, bytes, str]]) -> List[Optional[Score]]:
+        """Async version of `_score_batch`."""
+        try:
+            payload = await self.batch_runner.arun_json(
+                system_prompt=JUDGE_SYSTEM_PROMPT,
+                user_content=self._batch_prompt(batch),
+            )
+        except Exception as exc:
+            print(f"Judge batch evaluation failed: {exc}")
+            return [None] * len(batch)
+        return self._parse_batch(payload, len(batch))
+
+    @staticmethod
+    def _batch_prompt(batch: List[Tuple[int, bytes, str]]) -> str:
+        """User content for one batch: instructions plus every item, tagged by id."""
+        items = "\n".join(
+            f"### ELEMENTO id={item_id}\n{user_prompt}"
+            for item_id, (_, _, user_prompt) in enumerate(batch)
+        )
+        return f"{JUDGE_BATCH_INSTRUCTIONS}\n{items}"
+
+    @staticmethod
+    def _parse_batch(payload: dict, size: int) -> List[Optional[Score]]:
+        """Scores by item id from a batch reply; None where missing or invalid."""
+        results: List[Optional[Score]] = [None] * size
+        raw_items = payload.get("items") if isinstance(payload, dict) else None
+        for raw in raw_items if isinstance(raw_items, list) else ():
+            try:
+                item_id = int(raw.pop("id"))
+                if 0 <= item_id < size:
+                    results[item_id] = Score.model_validate(raw)
+            except Exception:
+                continue
+        return results
+
+    def _cache_get(self, key: bytes) -> Optional[Score]:
+        """Return a cached verdict and mark it as recently used."""
+        return self._cache.get(key)
+
+    def _cache_put(self, key: bytes, score: Score) -> None:
+        """Store a verdict, evicting the least recently used beyond `cache_size`."""
+        self._cache.put(key, score)
+
     def _build_prompt(self, context: Context, message: str) -> str:
         """Build evaluation prompt from context and message."""
         prompt = f"""
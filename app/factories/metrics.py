@@ -2,11 +2,49 @@
 Metrics: Aggregates and computes KPIs from interaction logs.
 Provides dashboard data and insights.
 """
+import operator
+
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
 from app.models import InteractionLog
 
+try:  # Optional: fused JIT kernel for the grouped sums (pip install numba)
+    import numba  # type: ignore
+except Exception:  # pragma: no cover
+    numba = None  # type: ignore
+
+METRIC_COLUMNS = ['reward', 'NPS_expected', 'EngagementProb', 'ChurnProb']
+_LOG_FIELDS = operator.attrgetter(
+    'arm', 'segment', 'issue_bucket', 'interaction_type', 'iteration',
+    'reward', 'score.NPS_expected', 'score.EngagementProb', 'score.ChurnProb',
+)
+BREAKDOWNS = (
+    ('by_arm', 'arm'),
+    ('by_segment', 'segment'),
+    ('by_issue', 'issue_bucket'),
+    ('by_type', 'interaction_type'),
+)
+# Below this many logs group codes come from `np.unique`, above from `pd.factorize`.
+SMALL_LOGS_THRESHOLD = 2000
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _group_sums(inverse: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+        """Per-group sums of every row of `values` in one pass over the logs."""
+        sums = np.zeros((values.shape[0], n_groups))
+        for i in range(inverse.shape[0]):
+            group = inverse[i]
+            for row in range(values.shape[0]):
+                sums[row, group] += values[row, i]
+        return sums
+
+    # Compile now (or load from numba's disk cache) rather than on first render.
+    _group_sums(np.zeros(2, dtype=np.intp), np.zeros((1, 2)), 1)
+else:
+    _group_sums = None
+
 
 class MetricsAggregator:
     """Computes aggregate metrics from interaction logs."""
@@ -16,6 +54,9 @@ class MetricsAggregator:
         """
         Aggregate metrics from interaction logs.
 
+        Every breakdown is a grouped sum over integer group codes (the numba
+        kernel when installed, else `np.bincount`); no DataFrame is built.
+
         Args:
             logs: List of interaction logs
 
@@ -25,80 +66,133 @@ class MetricsAggregator:
         if not logs:
             return MetricsAggregator._empty_metrics()
 
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame([log.model_dump() for log in logs])
+        columns = MetricsAggregator._log_columns(logs)
+        reward = columns['reward']
+        total = len(reward)
+        values = np.stack([columns[col] for col in METRIC_COLUMNS])
 
-        # Extract score fields
-        df['NPS_expected'] = df['score'].apply(lambda x: x['NPS_expected'])
-        df['EngagementProb'] = df['score'].apply(lambda x: x['EngagementProb'])
-        df['ChurnProb'] = df['score'].apply(lambda x: x['ChurnProb'])
-
-        # Overall metrics
         metrics = {
-            'n_interactions': len(df),
-            'avg_reward': df['reward'].mean(),
-            'avg_NPS': df['NPS_expected'].mean(),
-            'avg_engagement': df['EngagementProb'].mean(),
-            'avg_churn': df['ChurnProb'].mean(),
+            'n_interactions': total,
+            'avg_reward': reward.mean(),
+            'avg_NPS': columns['NPS_expected'].mean(),
+            'avg_engagement': columns['EngagementProb'].mean(),
+            'avg_churn': columns['ChurnProb'].mean(),
+        }
+
+        codes = {}
+        for name, key in BREAKDOWNS:
+            labels, inverse = MetricsAggregator._group_codes(columns[key])
+            codes[key] = (labels, inverse)
+            counts = np.bincount(inverse)
+            means = MetricsAggregator._bincount_means(inverse, counts, values)
+            labels = labels.tolist()
+            metrics[name] = {
+                ('reward', 'mean'): dict(zip(labels, means[0].round(3).tolist())),
+                ('reward', 'count'): dict(zip(labels, counts.tolist())),
+                ('NPS_expected', 'mean'): dict(zip(labels, means[1].round(3).tolist())),
+                ('EngagementProb', 'mean'): dict(zip(labels, means[2].round(3).tolist())),
+                ('ChurnProb', 'mean'): dict(zip(labels, means[3].round(3).tolist())),
+            }
+            if key == 'arm':
+                arm_rewards = means[0]
+                # value_counts order: most frequent first
+                order = np.argsort(-counts, kind='stable')
+                metrics['arm_distribution'] = {
+                    labels[i]: counts[i] / total for i in order.tolist()
+                }
+
+        labels, inverse = MetricsAggregator._group_codes(columns['iteration'])
+        means = MetricsAggregator._bincount_means(inverse, np.bincount(inverse), values)
+        labels = labels.tolist()
+        metrics['by_iteration'] = {
+            col: dict(zip(labels, row.round(3).tolist()))
+            for col, row in zip(METRIC_COLUMNS, means)
         }
 
-        # By template (arm)
-        arm_stats = df.groupby('arm').agg({
-            'reward': ['mean', 'count'],
-            'NPS_expected': 'mean',
-            'EngagementProb': 'mean',
-            'ChurnProb': 'mean'
-        }).round(3)
-        metrics['by_arm'] = arm_stats.to_dict()
-
-        # By segment
-        segment_stats = df.groupby('segment').agg({
-            'reward': ['mean', 'count'],
-            'NPS_expected': 'mean',
-            'EngagementProb': 'mean',
-            'ChurnProb': 'mean'
-        }).round(3)
-        metrics['by_segment'] = segment_stats.to_dict()
-
-        # By issue bucket
-        issue_stats = df.groupby('issue_bucket').agg({
-            'reward': ['mean', 'count'],
-            'NPS_expected': 'mean',
-            'EngagementProb': 'mean',
-            'ChurnProb': 'mean'
-        }).round(3)
-        metrics['by_issue'] = issue_stats.to_dict()
-
-        # By interaction type
-        type_stats = df.groupby('interaction_type').agg({
-            'reward': ['mean', 'count'],
-            'NPS_expected': 'mean',
-            'EngagementProb': 'mean',
-            'ChurnProb': 'mean'
-        }).round(3)
-        metrics['by_type'] = type_stats.to_dict()
-
-        # Arm selection distribution
-        arm_counts = df['arm'].value_counts().to_dict()
-        total = len(df)
-        arm_distribution = {arm: count/total for arm, count in arm_counts.items()}
-        metrics['arm_distribution'] = arm_distribution
-
-        # Evolution over iterations (if available)
-        if 'iteration' in df.columns:
-            iteration_stats = df.groupby('iteration').agg({
-                'reward': 'mean',
-                'NPS_expected': 'mean',
-                'EngagementProb': 'mean',
-                'ChurnProb': 'mean'
-            }).round(3)
-            metrics['by_iteration'] = iteration_stats.to_dict()
-
-        # Top insights
-        metrics['insights'] = MetricsAggregator._generate_insights(df)
+        arm_labels = codes['arm'][0]
+        metrics['insights'] = MetricsAggregator._generate_insights(
+            n_logs=total,
+            best_arm=(arm_labels[arm_rewards.argmax()], arm_rewards.max()),
+            best_segment_arm=MetricsAggregator._best_pair(codes['segment'], codes['arm'], reward),
+            best_issue_arm=MetricsAggregator._best_pair(codes['issue_bucket'], codes['arm'], reward),
+            avg_churn=metrics['avg_churn'],
+            avg_engagement=metrics['avg_engagement'],
+        )
 
         return metrics
 
+    @staticmethod
+    def _group_codes(values: np.ndarray) -> tuple:
+        """
+        `(sorted labels, per-log group code)` of a key column.
+
+        Labels come out sorted, like pandas' groupby, so the dicts keep its
+        order. Small batches use `np.unique`; from `SMALL_LOGS_THRESHOLD` logs
+        up, hash-based `pd.factorize` beats sorting the object column.
+        """
+        if len(values) < SMALL_LOGS_THRESHOLD:
+            return np.unique(values, return_inverse=True)
+        inverse, labels = pd.factorize(values, sort=True)
+        return labels, inverse
+
+    @staticmethod
+    def _bincount_means(inverse: np.ndarray, counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Per-group means of each row of `values`.
+
+        One fused numba pass when numba is installed, else one `bincount` per
+        metric; both add in log order, so the sums are identical.
+        """
+        if _group_sums is not None:
+            return _group_sums(inverse, values, len(counts)) / counts
+        return np.stack([
+            np.bincount(inverse, weights=row, minlength=len(counts)) for row in values
+        ]) / counts
+
+    @staticmethod
+    def _best_pair(outer: tuple, arm: tuple, reward: np.ndarray) -> tuple:
+        """
+        `((outer_label, arm), mean_reward)` of the best-rewarded pair.
+
+        Pairs are enumerated in sorted (outer, arm) order, so ties resolve to the
+        same label as `idxmax` over the pandas groupby.
+        """
+        (outer_labels, outer_inv), (arm_labels, arm_inv) = outer, arm
+        n_arms = len(arm_labels)
+        size = len(outer_labels) * n_arms
+        pair = outer_inv * n_arms + arm_inv
+        counts = np.bincount(pair, minlength=size)
+        sums = np.bincount(pair, weights=reward, minlength=size)
+        present = np.flatnonzero(counts)
+        means = sums[present] / counts[present]
+        best = int(means.argmax())
+        i, j = divmod(int(present[best]), n_arms)
+        return (outer_labels[i], arm_labels[j]), means[best]
+
+    @staticmethod
+    def _log_columns(logs: List[InteractionLog]) -> Dict[str, np.ndarray]:
+        """
+        Pull the analysis columns out of the logs in a single pass.
+
+        Fields are pulled with one C-level `attrgetter` per log (no
+        `model_dump`/`.apply`), so numeric columns arrive as float arrays
+        instead of object sequences.
+        """
+        (arm, segment, issue, interaction_type, iteration,
+         reward, nps, engagement, churn) = zip(*map(_LOG_FIELDS, logs))
+
+        return {
+            'arm': np.array(arm, dtype=object),
+            'segment': np.array(segment, dtype=object),
+            'issue_bucket': np.array(issue, dtype=object),
+            'interaction_type': np.array(interaction_type, dtype=object),
+            'iteration': np.array(iteration, dtype=np.int64),
+            'reward': np.array(reward, dtype=np.float64),
+            'NPS_expected': np.array(nps, dtype=np.float64),
+            'EngagementProb': np.array(engagement, dtype=np.float64),
+            'ChurnProb': np.array(churn, dtype=np.float64),
+        }
+
     @staticmethod
     def _empty_metrics() -> Dict[str, Any]:
         """Return empty metrics structure."""
@@ -118,12 +212,24 @@ class MetricsAggregator:
         }
 
     @staticmethod
-    def _generate_insights(df: pd.DataFrame) -> List[str]:
+    def _generate_insights(
+        n_logs: int,
+        best_arm: tuple,
+        best_segment_arm: tuple,
+        best_issue_arm: tuple,
+        avg_churn: float,
+        avg_engagement: float,
+    ) -> List[str]:
         """
         Generate textual insights from data.
 
         Args:
-            df: DataFrame with interaction logs
+            n_logs: Number of interaction logs
+            best_arm: `(arm, mean_reward)` of the best template overall
+            best_segment_arm: `((segment, arm), mean_reward)` of the best pair
+            best_issue_arm: `((issue_bucket, arm), mean_reward)` of the best pair
+            avg_churn: Overall mean churn probability
+            avg_engagement: Overall mean engagement probability
 
         Returns:
             List of insight strings
@@ -131,42 +237,31 @@ class MetricsAggregator:
         insights = []
 
         # Best performing template overall
-        arm_rewards = df.groupby('arm')['reward'].mean()
-        if len(arm_rewards) > 0:
-            best_arm = arm_rewards.idxmax()
-            best_reward = arm_rewards.max()
-            insights.append(
-                f"Plantilla '{best_arm}' tiene el mejor desempeño global (reward: {best_reward:.3f})"
-            )
+        best_arm_label, best_reward = best_arm
+        insights.append(
+            f"Plantilla '{best_arm_label}' tiene el mejor desempeño global (reward: {best_reward:.3f})"
+        )
 
         # Best segment-template combination
-        if len(df) > 10:  # Only if enough data
-            segment_arm = df.groupby(['segment', 'arm'])['reward'].mean()
-            if len(segment_arm) > 0:
-                best_combo = segment_arm.idxmax()
-                best_combo_reward = segment_arm.max()
-                insights.append(
-                    f"Mejor combinación: {best_combo[0]} + {best_combo[1]} (reward: {best_combo_reward:.3f})"
-                )
+        if n_logs > 10:  # Only if enough data
+            best_combo, best_combo_reward = best_segment_arm
+            insights.append(
+                f"Mejor combinación: {best_combo[0]} + {best_combo[1]} (reward: {best_combo_reward:.3f})"
+            )
 
         # Issue bucket insights
-        if 'issue_bucket' in df.columns:
-            issue_arm = df.groupby(['issue_bucket', 'arm'])['reward'].mean()
-            if len(issue_arm) > 0:
-                best_issue_combo = issue_arm.idxmax()
-                insights.append(
-                    f"Para {best_issue_combo[0]}, usar '{best_issue_combo[1]}'"
-                )
+        best_issue_combo, _ = best_issue_arm
+        insights.append(
+            f"Para {best_issue_combo[0]}, usar '{best_issue_combo[1]}'"
+        )
 
         # Churn risk insight
-        avg_churn = df['ChurnProb'].mean()
         if avg_churn > 0.5:
             insights.append(
                 f"⚠️ Riesgo de churn promedio alto ({avg_churn:.1%}), revisar estrategias de retención"
             )
 
         # Engagement insight
-        avg_engagement = df['EngagementProb'].mean()
         if avg_engagement < 0.5:
             insights.append(
                 f"💡 Engagement bajo ({avg_engagement:.1%}), considerar mensajes más accionables"
@@ -194,17 +289,23 @@ class MetricsAggregator:
         if not treatment_logs or not baseline_logs:
             return 0.0
 
-        if metric == 'reward':
-            treatment_val = np.mean([log.reward for log in treatment_logs])
-            baseline_val = np.mean([log.reward for log in baseline_logs])
-        elif metric == 'NPS_expected':
-            treatment_val = np.mean([log.score.NPS_expected for log in treatment_logs])
-            baseline_val = np.mean([log.score.NPS_expected for log in baseline_logs])
-        else:
+        if metric not in ('reward', 'NPS_expected'):
             return 0.0
 
+        treatment_val = MetricsAggregator._extract(treatment_logs, metric).mean()
+        baseline_val = MetricsAggregator._extract(baseline_logs, metric).mean()
+
         if baseline_val == 0:
             return 0.0
 
         lift = (treatment_val - baseline_val) / baseline_val
         return lift * 100  # percentage
+
+    @staticmethod
+    def _extract(logs: List[InteractionLog], metric: str) -> np.ndarray:
+        """Pull one metric into a preallocated float array (no intermediate list)."""
+        if metric == 'reward':
+            values = (log.reward for log in logs)
+        else:
+            values = (log.score.NPS_expected for log in logs)
+        return np.fromiter(values, dtype=np.float64, count=len(logs))
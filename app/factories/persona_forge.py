@@ -2,7 +2,6 @@
 PersonaForge: Synthetic customer data generator.
 Generates diverse customer profiles with realistic attributes.
 """
-import random
 import numpy as np
 from typing import Literal
 from app.models import Customer
@@ -63,6 +62,16 @@ MINI_STORIES = {
 }
 
 
+ISSUE_BUCKETS = ["mecanica", "finanzas", "logistica", "atencion"]
+PRICE_RANGES = {
+    "VF": (300000, 600000),
+    "VE": (150000, 350000),
+    "NVF": (250000, 500000),
+    "NVE": (100000, 300000),
+}
+CHANNELS = ["whatsapp", "email", "phone", "sms"]
+
+
 class PersonaForge:
     """Generates synthetic customer data for simulation."""
 
@@ -73,8 +82,7 @@ class PersonaForge:
         Args:
             seed: Random seed for reproducibility
         """
-        random.seed(seed)
-        np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
 
     def generate(
         self,
@@ -86,6 +94,9 @@ class PersonaForge:
         """
         Generate synthetic customer dataset.
 
+        All random attributes are drawn as arrays up front; the final loop only
+        assembles `Customer` objects.
+
         Args:
             n: Number of customers to generate
             segments: List of segments to sample from
@@ -98,74 +109,76 @@ class PersonaForge:
         if segments is None:
             segments = ["VF", "VE", "NVF", "NVE"]
 
-        customers = []
+        rng = self.rng
+        seg_idx = rng.integers(len(segments), size=n)
+        segment = np.asarray(segments)[seg_idx]
+        is_vocal = rng.random(n) < p_vocal
+        has_issues = rng.random(n) < p_angry
 
-        for i in range(n):
-            segment = random.choice(segments)
-            is_vocal = random.random() < p_vocal
-            has_issues = random.random() < p_angry
-
-            # Price distribution by segment
-            if segment == "VF":
-                price = np.random.uniform(300000, 600000)
-            elif segment == "VE":
-                price = np.random.uniform(150000, 350000)
-            elif segment == "NVF":
-                price = np.random.uniform(250000, 500000)
-            else:  # NVE
-                price = np.random.uniform(100000, 300000)
-
-            # Recency (days since last purchase)
-            last_purchase_days = int(np.random.exponential(30)) + 1
-
-            # Past NPS (lower if has issues)
-            if has_issues:
-                past_NPS = random.randint(0, 6)
-            else:
-                past_NPS = random.randint(6, 10)
+        # Price distribution by segment: gather (lo, hi) bounds, one uniform draw
+        bounds = np.array([PRICE_RANGES[seg] for seg in segments], dtype=float)[seg_idx]
+        price = rng.uniform(bounds[:, 0], bounds[:, 1])
 
-            # Churn risk (higher if has issues and low NPS)
-            churn_risk_est = min(1.0, (10 - past_NPS) / 10 + (0.3 if has_issues else 0))
-            churn_risk_est = round(churn_risk_est, 2)
+        # Recency (days since last purchase)
+        last_purchase_days = rng.exponential(30, n).astype(int) + 1
 
-            # Issue bucket and messages (if applicable)
-            issue_bucket = None
-            first_message = None
-            mini_story = None
+        # Past NPS (lower if has issues)
+        past_NPS = np.where(has_issues, rng.integers(0, 7, n), rng.integers(6, 11, n))
 
-            if has_issues:
-                issue_bucket = random.choice(["mecanica", "finanzas", "logistica", "atencion"])
+        # Churn risk (higher if has issues and low NPS)
+        churn_risk_est = np.minimum(1.0, (10 - past_NPS) / 10 + np.where(has_issues, 0.3, 0.0))
+        churn_risk_est = churn_risk_est.round(2)
 
-                if is_vocal:
-                    first_message = random.choice(ISSUE_MESSAGES[issue_bucket])
+        # Issue bucket, message/story picks and story time values
+        issue_bucket = rng.choice(ISSUE_BUCKETS, size=n)
+        message_pick = rng.random(n)
+        story_pick = rng.random(n)
+        time_value = rng.integers(1, 5, n)
+        channel_pref = rng.choice(CHANNELS, size=n)
+
+        customers = []
+        rows = zip(
+            segment.tolist(),
+            is_vocal.tolist(),
+            has_issues.tolist(),
+            price.round(2).tolist(),
+            last_purchase_days.tolist(),
+            past_NPS.tolist(),
+            churn_risk_est.tolist(),
+            issue_bucket.tolist(),
+            message_pick.tolist(),
+            story_pick.tolist(),
+            time_value.tolist(),
+            channel_pref.tolist(),
+        )
+        for i, (seg, vocal, issues, price_i, days, nps, churn, bucket, msg_u, story_u, t, channel) in enumerate(rows):
+            first_message = None
+            if issues:
+                if vocal:
+                    messages = ISSUE_MESSAGES[bucket]
+                    first_message = messages[int(msg_u * len(messages))]
 
                 # Generate mini story with time context
-                story_template = random.choice(MINI_STORIES[issue_bucket])
-                if "{}" in story_template:
-                    time_value = random.randint(1, 4)
-                    mini_story = story_template.format(time_value)
-                else:
-                    mini_story = story_template
+                stories = MINI_STORIES[bucket]
+                story_template = stories[int(story_u * len(stories))]
+                mini_story = story_template.format(t) if "{}" in story_template else story_template
             else:
-                mini_story = f"Cliente satisfecho, compra reciente hace {last_purchase_days} días."
-
-            channel_pref = random.choice(["whatsapp", "email", "phone", "sms"])
-
-            customer = Customer(
-                customer_id=f"C{str(i+1).zfill(4)}",
-                segment=segment,
-                is_vocal=is_vocal,
-                last_purchase_days=last_purchase_days,
-                price=round(price, 2),
-                issues_flag=1 if has_issues else 0,
-                past_NPS=past_NPS,
+                bucket = None
+                mini_story = f"Cliente satisfecho, compra reciente hace {days} días."
+
+            customers.append(Customer(
+                customer_id=f"C{i+1:04d}",
+                segment=seg,
+                is_vocal=vocal,
+                last_purchase_days=days,
+                price=price_i,
+                issues_flag=1 if issues else 0,
+                past_NPS=nps,
                 first_message=first_message,
-                channel_pref=channel_pref,
-                churn_risk_est=churn_risk_est,
-                issue_bucket=issue_bucket,
+                channel_pref=channel,
+                churn_risk_est=churn,
+                issue_bucket=bucket,
                 mini_story=mini_story
-            )
-
-            customers.append(customer)
+            ))
 
         return customers
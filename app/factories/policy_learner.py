@@ -3,7 +3,7 @@ Policy Learner: Multi-armed bandit with Thompson Sampling.
 Maintains per-context arm selection and updates based on rewards.
 """
 import numpy as np
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
 
 class ThompsonBandit:
@@ -13,7 +13,13 @@ class ThompsonBandit:
     Supports contextual bandits via context-specific states.
     """
 
-    def __init__(self, arms: list[str], alpha_prior: float = 1.0, beta_prior: float = 1.0):
+    def __init__(
+        self,
+        arms: list[str],
+        alpha_prior: float = 1.0,
+        beta_prior: float = 1.0,
+        rng: Optional[np.random.Generator] = None,
+    ):
         """
         Initialize Thompson Sampling bandit.
 
@@ -21,20 +27,28 @@ class ThompsonBandit:
             arms: List of arm IDs (template IDs)
             alpha_prior: Prior alpha parameter for Beta distribution
             beta_prior: Prior beta parameter for Beta distribution
+            rng: Random generator (defaults to a fresh `np.random.default_rng()`)
         """
         self.arms = arms
         self.alpha_prior = alpha_prior
         self.beta_prior = beta_prior
+        self._arm_index = {arm: i for i, arm in enumerate(arms)}
+        self.rng = rng if rng is not None else np.random.default_rng()
 
         # Global state (used when no context provided)
-        self.global_state = {
-            arm: {"alpha": alpha_prior, "beta": beta_prior}
-            for arm in arms
-        }
+        self.global_state = self._new_state()
 
         # Contextual state: dict[(segment, issue_bucket)] -> arm_state
         self.contextual_state = {}
 
+    def _new_state(self) -> dict:
+        """Beta parameters for every arm, packed as arrays aligned with `self.arms`."""
+        n_arms = len(self.arms)
+        return {
+            "alpha": np.full(n_arms, self.alpha_prior, dtype=float),
+            "beta": np.full(n_arms, self.beta_prior, dtype=float),
+        }
+
     def _get_state(self, context: Optional[Tuple[str, str]] = None) -> dict:
         """
         Get state dict for given context.
@@ -50,10 +64,7 @@ class ThompsonBandit:
 
         if context not in self.contextual_state:
             # Initialize new context with priors
-            self.contextual_state[context] = {
-                arm: {"alpha": self.alpha_prior, "beta": self.beta_prior}
-                for arm in self.arms
-            }
+            self.contextual_state[context] = self._new_state()
 
         return self.contextual_state[context]
 
@@ -69,14 +80,36 @@ class ThompsonBandit:
         """
         state = self._get_state(context)
 
-        # Sample from Beta distribution for each arm
-        samples = {
-            arm: np.random.beta(s["alpha"], s["beta"])
-            for arm, s in state.items()
-        }
+        # One vectorized Beta draw across all arms; return the highest sample
+        samples = self.rng.beta(state["alpha"], state["beta"])
+        return self.arms[int(samples.argmax())]
+
+    def select_batch(self, contexts: Sequence[Optional[Tuple[str, str]]]) -> list[str]:
+        """
+        Select one arm per entry of `contexts` (for simulation/replay loops).
+
+        Draws an (n, K) Beta matrix per distinct context in a single call
+        instead of sampling arm by arm.
+
+        Args:
+            contexts: Context tuple (or None for global) for each selection
 
-        # Return arm with highest sample
-        return max(samples, key=samples.get)
+        Returns:
+            Selected arm IDs, aligned with `contexts`
+        """
+        positions: dict = {}
+        for pos, context in enumerate(contexts):
+            positions.setdefault(context, []).append(pos)
+
+        selected: list[str] = [""] * len(contexts)
+        for context, idx in positions.items():
+            state = self._get_state(context)
+            samples = self.rng.beta(
+                state["alpha"], state["beta"], size=(len(idx), len(self.arms))
+            )
+            for pos, arm_i in zip(idx, samples.argmax(axis=1)):
+                selected[pos] = self.arms[arm_i]
+        return selected
 
     def update(self, arm: str, reward: float, context: Optional[Tuple[str, str]] = None):
         """
@@ -87,14 +120,42 @@ class ThompsonBandit:
             reward: Observed reward in [0, 1]
             context: Optional context tuple
         """
-        # Clip reward to [0, 1]
-        r = np.clip(reward, 0, 1)
+        # Clip reward to [0, 1] (plain Python: np.clip costs more than the math here)
+        r = 0.0 if reward < 0 else 1.0 if reward > 1 else reward
 
         state = self._get_state(context)
+        i = self._arm_index[arm]
 
         # Update Beta distribution parameters
-        state[arm]["alpha"] += r
-        state[arm]["beta"] += (1 - r)
+        state["alpha"][i] += r
+        state["beta"][i] += (1 - r)
+
+    def update_batch(
+        self,
+        arm_idxs: np.ndarray,
+        rewards: np.ndarray,
+        context: Optional[Tuple[str, str]] = None,
+    ):
+        """
+        Apply many updates for one context at once.
+
+        Equivalent to calling `update` for each pair; repeated arms accumulate
+        (`np.add.at` is an unbuffered scatter-add).
+
+        Args:
+            arm_idxs: Arm positions in `self.arms` (see `arm_indices`)
+            rewards: Observed rewards, aligned with `arm_idxs`
+            context: Optional context tuple
+        """
+        r = np.clip(np.asarray(rewards, dtype=float), 0, 1)
+        state = self._get_state(context)
+
+        np.add.at(state["alpha"], arm_idxs, r)
+        np.add.at(state["beta"], arm_idxs, 1 - r)
+
+    def arm_indices(self, arms: Sequence[str]) -> np.ndarray:
+        """Positions of `arms` in `self.arms`, for `update_batch`."""
+        return np.fromiter((self._arm_index[arm] for arm in arms), dtype=np.intp, count=len(arms))
 
     def get_statistics(self, context: Optional[Tuple[str, str]] = None) -> dict:
         """
@@ -107,24 +168,25 @@ class ThompsonBandit:
             Dictionary with mean and std for each arm
         """
         state = self._get_state(context)
-
-        stats = {}
-        for arm, s in state.items():
-            alpha = s["alpha"]
-            beta = s["beta"]
-            mean = alpha / (alpha + beta)
-            variance = (alpha * beta) / ((alpha + beta) ** 2 * (alpha + beta + 1))
-            std = np.sqrt(variance)
-
-            stats[arm] = {
-                "mean": mean,
-                "std": std,
-                "alpha": alpha,
-                "beta": beta,
-                "n_pulls": alpha + beta - 2  # subtract priors
+        alpha = state["alpha"]
+        beta = state["beta"]
+
+        # Vectorized Beta moments across all arms
+        total = alpha + beta
+        mean = alpha / total
+        std = np.sqrt((alpha * beta) / (total ** 2 * (total + 1)))
+        n_pulls = total - 2  # subtract priors
+
+        return {
+            arm: {
+                "mean": mean[i],
+                "std": std[i],
+                "alpha": alpha[i],
+                "beta": beta[i],
+                "n_pulls": n_pulls[i],
             }
-
-        return stats
+            for i, arm in enumerate(self.arms)
+        }
 
     def get_all_contexts(self) -> list[Tuple[str, str]]:
         """Get list of all contexts seen so far."""
@@ -137,36 +199,47 @@ class EpsilonGreedyBandit:
     Simpler alternative to Thompson Sampling.
     """
 
-    def __init__(self, arms: list[str], epsilon: float = 0.1):
+    def __init__(
+        self,
+        arms: list[str],
+        epsilon: float = 0.1,
+        rng: Optional[np.random.Generator] = None,
+    ):
         """
         Initialize epsilon-greedy bandit.
 
         Args:
             arms: List of arm IDs
             epsilon: Exploration probability
+            rng: Random generator (defaults to a fresh `np.random.default_rng()`)
         """
         self.arms = arms
         self.epsilon = epsilon
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self._arm_index = {arm: i for i, arm in enumerate(arms)}
 
         # Global state
-        self.global_state = {
-            arm: {"total_reward": 0.0, "count": 0}
-            for arm in arms
-        }
+        self.global_state = self._new_state()
 
         # Contextual state
         self.contextual_state = {}
 
+    def _new_state(self) -> dict:
+        """Reward totals, pull counts and running means aligned with `self.arms`."""
+        n_arms = len(self.arms)
+        return {
+            "total_reward": np.zeros(n_arms),
+            "count": np.zeros(n_arms, dtype=np.int64),
+            "mean": np.zeros(n_arms),  # 0.0 until an arm is pulled
+        }
+
     def _get_state(self, context: Optional[Tuple[str, str]] = None) -> dict:
         """Get state dict for given context."""
         if context is None:
             return self.global_state
 
         if context not in self.contextual_state:
-            self.contextual_state[context] = {
-                arm: {"total_reward": 0.0, "count": 0}
-                for arm in self.arms
-            }
+            self.contextual_state[context] = self._new_state()
 
         return self.contextual_state[context]
 
@@ -175,41 +248,56 @@ class EpsilonGreedyBandit:
         state = self._get_state(context)
 
         # Explore with probability epsilon
-        if np.random.random() < self.epsilon:
-            return np.random.choice(self.arms)
+        if self.rng.random() < self.epsilon:
+            return self.arms[self.rng.integers(len(self.arms))]
 
         # Exploit: choose arm with highest mean reward
-        means = {
-            arm: (s["total_reward"] / s["count"] if s["count"] > 0 else 0.0)
-            for arm, s in state.items()
-        }
-
-        return max(means, key=means.get)
+        return self.arms[int(state["mean"].argmax())]
 
     def update(self, arm: str, reward: float, context: Optional[Tuple[str, str]] = None):
         """Update arm statistics."""
-        r = np.clip(reward, 0, 1)
+        r = 0.0 if reward < 0 else 1.0 if reward > 1 else reward
         state = self._get_state(context)
+        i = self._arm_index[arm]
+
+        state["total_reward"][i] += r
+        state["count"][i] += 1
+        state["mean"][i] = state["total_reward"][i] / state["count"][i]
+
+    def update_batch(
+        self,
+        arm_idxs: np.ndarray,
+        rewards: np.ndarray,
+        context: Optional[Tuple[str, str]] = None,
+    ):
+        """Apply many updates for one context at once (see `ThompsonBandit.update_batch`)."""
+        r = np.clip(np.asarray(rewards, dtype=float), 0, 1)
+        state = self._get_state(context)
+
+        np.add.at(state["total_reward"], arm_idxs, r)
+        np.add.at(state["count"], arm_idxs, 1)
+        touched = np.unique(arm_idxs)
+        state["mean"][touched] = state["total_reward"][touched] / state["count"][touched]
 
-        state[arm]["total_reward"] += r
-        state[arm]["count"] += 1
+    def arm_indices(self, arms: Sequence[str]) -> np.ndarray:
+        """Positions of `arms` in `self.arms`, for `update_batch`."""
+        return np.fromiter((self._arm_index[arm] for arm in arms), dtype=np.intp, count=len(arms))
 
     def get_statistics(self, context: Optional[Tuple[str, str]] = None) -> dict:
         """Get current statistics for all arms."""
         state = self._get_state(context)
-
-        stats = {}
-        for arm, s in state.items():
-            count = s["count"]
-            mean = s["total_reward"] / count if count > 0 else 0.0
-
-            stats[arm] = {
-                "mean": mean,
-                "total_reward": s["total_reward"],
-                "n_pulls": count
+        mean = state["mean"]
+        total_reward = state["total_reward"]
+        count = state["count"]
+
+        return {
+            arm: {
+                "mean": mean[i],
+                "total_reward": total_reward[i],
+                "n_pulls": count[i],
             }
-
-        return stats
+            for i, arm in enumerate(self.arms)
+        }
 
     def get_all_contexts(self) -> list[Tuple[str, str]]:
         """Get list of all contexts seen so far."""
@@ -42,61 +42,49 @@ class Prioritizer:
         if not customers:
             return []
 
-        # Compute scores
-        scored = []
-        prices = [c.price for c in customers]
-        max_price = max(prices) if prices else 1.0
-        recencies = [c.last_purchase_days for c in customers]
-        max_recency = max(recencies) if recencies else 1.0
+        scores = self._compute_scores(customers)
 
-        for customer in customers:
-            score = self._compute_score(customer, max_price, max_recency)
-            scored.append((customer, score))
+        # Highest score first; ties keep input order (stable, like list.sort)
+        if top_n and top_n < len(customers):
+            idx = np.argpartition(-scores, top_n - 1)[:top_n]
+            idx = idx[np.lexsort((idx, -scores[idx]))]
+        else:
+            idx = np.argsort(-scores, kind="stable")
 
-        # Sort by score descending
-        scored.sort(key=lambda x: x[1], reverse=True)
+        return [customers[i] for i in idx]
 
-        # Return top N
-        if top_n:
-            scored = scored[:top_n]
-
-        return [c for c, s in scored]
-
-    def _compute_score(
-        self,
-        customer: Customer,
-        max_price: float,
-        max_recency: float
-    ) -> float:
+    def _compute_scores(self, customers: List[Customer]) -> np.ndarray:
         """
-        Compute priority score for a customer.
+        Compute priority scores for all customers at once.
 
         Formula: S = w_issues*issues + w_price*norm(price) + w_recency*norm(1/recency)
 
         Args:
-            customer: Customer to score
-            max_price: Max price for normalization
-            max_recency: Max recency for normalization
+            customers: Customers to score
 
         Returns:
-            Priority score
+            Array of priority scores aligned with `customers`
         """
-        # Issues component
-        issues_score = float(customer.issues_flag)
+        n = len(customers)
+        issues = np.fromiter((c.issues_flag for c in customers), dtype=np.float64, count=n)
+        prices = np.fromiter((c.price for c in customers), dtype=np.float64, count=n)
+        recencies = np.fromiter((c.last_purchase_days for c in customers), dtype=np.float64, count=n)
 
         # Price component (normalized)
-        price_score = customer.price / max_price if max_price > 0 else 0.0
+        max_price = prices.max()
+        price_score = prices / max_price if max_price > 0 else np.zeros(n)
 
         # Recency component (inverse: more recent = higher score)
         # Add 1 to avoid division by zero
-        recency_score = 1.0 / (customer.last_purchase_days + 1)
-        recency_score = recency_score / (1.0 / (max_recency + 1)) if max_recency > 0 else 0.0
+        max_recency = recencies.max()
+        if max_recency > 0:
+            recency_score = (1.0 / (recencies + 1)) / (1.0 / (max_recency + 1))
+        else:
+            recency_score = np.zeros(n)
 
         # Weighted sum
-        score = (
-            self.w_issues * issues_score +
+        return (
+            self.w_issues * issues +
             self.w_price * price_score +
             self.w_recency * recency_score
         )
-
-        return score
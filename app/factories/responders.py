@@ -2,9 +2,11 @@
 Responder and Outreach agents for message generation.
 Uses OpenAI Agents (Responses API) to produce customer-facing messages.
 """
-from typing import Optional
+import asyncio
+import string
+from typing import List, Optional
 
-from app.factories.agents_runner import AgentsRunner
+from app.factories.agents_runner import DEFAULT_MAX_CONCURRENCY, AgentsRunner, LRUCache
 from app.models import Context
 
 
@@ -31,7 +33,7 @@ Si el cliente está enojado:
 
 Devuelve SOLO el texto final para el cliente (sin JSON, sin metadatos, sin explicaciones).
 El mensaje debe estar listo para enviar por el canal preferido del cliente.
-"""
+""".strip()
 
 
 OUTREACH_SYSTEM_PROMPT = """
@@ -55,7 +57,100 @@ REGLAS:
 
 Devuelve SOLO el texto final para enviar (sin JSON, sin metadatos).
 El mensaje debe estar listo para el canal preferido del cliente.
-"""
+""".strip()
+
+# The system prompts above are static (customer data only goes in the user
+# message), so every request opens with the same prefix and OpenAI's automatic
+# prompt cache can serve it; the runner builds each system message once.
+# Bump the version whenever a prompt changes.
+RESPONDER_PROMPT_CACHE_KEY = "responder-v1"
+OUTREACH_PROMPT_CACHE_KEY = "outreach-v1"
+
+# Canned messages used when the LLM call fails; `channel` is the customer's
+# preferred channel.
+_RESPONDER_FALLBACK = string.Template("""
+Estimado cliente,
+
+Hemos recibido tu mensaje y estamos trabajando en resolverlo.
+
+Un miembro de nuestro equipo se pondrá en contacto contigo en las próximas 24 horas por ${channel}.
+
+Gracias por tu paciencia.
+
+Atentamente,
+Equipo Kavak
+""".strip())
+
+_OUTREACH_FALLBACK = string.Template("""
+Hola,
+
+Esperamos que estés disfrutando tu vehículo.
+
+Queremos asegurarnos de que todo esté bien. Si tienes alguna duda o necesitas soporte, estamos aquí para ayudarte.
+
+Responde a este mensaje o contáctanos por ${channel}.
+
+Saludos,
+Equipo Kavak
+""".strip())
+
+# Outreach prompts combined into one request by `OutreachAgent.run_batch`.
+OUTREACH_BATCH_SIZE = 8
+
+OUTREACH_BATCH_INSTRUCTIONS = """
+Esta solicitud incluye VARIOS clientes. Genera un mensaje independiente para CADA uno,
+siguiendo sus instrucciones y contexto. En lugar de texto plano, devuelve JSON ESTRICTO:
+{"items": [{"id": <int>, "message": "<texto final para el cliente>"}, ...]}
+Incluye exactamente un objeto por cliente, con el mismo "id".
+""".strip()
+
+# Output-token bins for `run_many`. Sized from the prompts' word limits
+# (120-150 words is roughly 160-220 Spanish tokens) so short replies are not cut.
+SHORT_REPLY_TOKENS = 160
+MEDIUM_REPLY_TOKENS = 220
+LONG_REPLY_TOKENS = 300
+LONG_MESSAGE_CHARS = 280
+
+
+def _predict_max_tokens(context: Context) -> int:
+    """
+    Predict an output-token bin for a customer's reply.
+
+    Vocal customers with a reported issue or a long first message get the
+    longest bin; proactive pings without issues get the shortest.
+    """
+    if context.is_vocal:
+        if context.issues_flag or len(context.first_message or "") > LONG_MESSAGE_CHARS:
+            return LONG_REPLY_TOKENS
+        return MEDIUM_REPLY_TOKENS
+    return MEDIUM_REPLY_TOKENS if context.issues_flag else SHORT_REPLY_TOKENS
+
+
+async def _run_binned(agent, contexts: List[Context], templates: List[str]) -> List[str]:
+    """
+    Dispatch `agent.arun` calls grouped by predicted reply length.
+
+    Each bin is its own concurrent batch with a matching `max_output_tokens`
+    (capped at the agent's `max_tokens`), so short replies don't share a
+    batch with, or get billed like, long ones. Results keep input order.
+    """
+    bins: dict = {}
+    for pos, ctx in enumerate(contexts):
+        limit = min(_predict_max_tokens(ctx), agent.max_tokens)
+        bins.setdefault(limit, []).append(pos)
+
+    async def run_bin(limit: int, positions: List[int]) -> List[str]:
+        return await asyncio.gather(*(
+            agent.arun(contexts[pos], templates[pos], max_output_tokens=limit)
+            for pos in positions
+        ))
+
+    results: List[str] = [""] * len(contexts)
+    outputs = await asyncio.gather(*(run_bin(limit, pos) for limit, pos in bins.items()))
+    for positions, texts in zip(bins.values(), outputs):
+        for pos, text in zip(positions, texts):
+            results[pos] = text
+    return results
 
 
 class ResponderAgent:
@@ -67,6 +162,10 @@ class ResponderAgent:
         model: str = "gpt-4.1-mini",
         temperature: float = 0.4,
         max_tokens: int = 300,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        cache: Optional[LRUCache] = None,
     ):
         """
         Initialize Responder Agent.
@@ -76,12 +175,22 @@ class ResponderAgent:
             model: Model to use
             temperature: Sampling temperature
             max_tokens: Maximum output tokens for response
+            max_concurrency: Requests in flight at once in `run_many`
+            requests_per_minute: Optional RPM budget for `run_many`
+            tokens_per_minute: Optional TPM budget for `run_many`
+            cache: Response cache to share (e.g. across agent instances)
         """
+        self.max_tokens = max_tokens
         self.runner = AgentsRunner(
             api_key=api_key,
             model=model,
             temperature=temperature,
             max_output_tokens=max_tokens,
+            prompt_cache_key=RESPONDER_PROMPT_CACHE_KEY,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            cache=cache,
         )
 
     def run(self, context: Context, template_text: str) -> str:
@@ -104,20 +213,45 @@ class ResponderAgent:
             print(f"Responder error: {exc}")
             return self._fallback_message(context)
 
-    def _fallback_message(self, context: Context) -> str:
-        """Fallback message when LLM fails."""
-        return f"""
-Estimado cliente,
+    async def arun(
+        self,
+        context: Context,
+        template_text: str,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Async twin of `run`; `max_output_tokens` overrides `max_tokens`.
+        """
+        try:
+            return await self.runner.arun_text(
+                system_prompt=RESPONDER_SYSTEM_PROMPT,
+                user_content=template_text,
+                max_output_tokens=max_output_tokens,
+            )
+        except Exception as exc:
+            print(f"Responder error: {exc}")
+            return self._fallback_message(context)
 
-Hemos recibido tu mensaje y estamos trabajando en resolverlo.
+    async def run_many(self, contexts: List[Context], templates: List[str]) -> List[str]:
+        """
+        Generate response messages for many customers concurrently.
 
-Un miembro de nuestro equipo se pondrá en contacto contigo en las próximas 24 horas por {context.channel_pref}.
+        Requests overlap up to the runner's `max_concurrency` (and RPM/TPM
+        budgets, if set) and are binned by predicted reply length (see
+        `_predict_max_tokens`); failures fall back per customer like `run`.
 
-Gracias por tu paciencia.
+        Args:
+            contexts: Customer contexts
+            templates: Template prompts, aligned with `contexts`
 
-Atentamente,
-Equipo Kavak
-""".strip()
+        Returns:
+            Final message texts, aligned with `contexts`
+        """
+        return await _run_binned(self, contexts, templates)
+
+    def _fallback_message(self, context: Context) -> str:
+        """Fallback message when LLM fails."""
+        return _RESPONDER_FALLBACK.substitute(channel=context.channel_pref)
 
 
 class OutreachAgent:
@@ -129,6 +263,10 @@ class OutreachAgent:
         model: str = "gpt-4.1-mini",
         temperature: float = 0.5,
         max_tokens: int = 250,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        cache: Optional[LRUCache] = None,
     ):
         """
         Initialize Outreach Agent.
@@ -138,12 +276,34 @@ class OutreachAgent:
             model: Model to use
             temperature: Sampling temperature
             max_tokens: Maximum output tokens for response
+            max_concurrency: Requests in flight at once in `run_many`
+            requests_per_minute: Optional RPM budget for `run_many`
+            tokens_per_minute: Optional TPM budget for `run_many`
+            cache: Response cache to share (e.g. across agent instances)
         """
+        self.max_tokens = max_tokens
         self.runner = AgentsRunner(
             api_key=api_key,
             model=model,
             temperature=temperature,
             max_output_tokens=max_tokens,
+            prompt_cache_key=OUTREACH_PROMPT_CACHE_KEY,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            cache=cache,
+        )
+        # Same client and settings, with room for a full batch of messages.
+        self.batch_runner = AgentsRunner(
+            api_key=api_key,
+            model=model,
+            temperature=temperature,
+            max_output_tokens=max_tokens * OUTREACH_BATCH_SIZE,
+            prompt_cache_key=OUTREACH_PROMPT_CACHE_KEY,
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            cache=cache,
         )
 
     def run(self, context: Context, template_text: str) -> str:
@@ -166,17 +326,93 @@ class OutreachAgent:
             print(f"Outreach error: {exc}")
             return self._fallback_message(context)
 
-    def _fallback_message(self, context: Context) -> str:
-        """Fallback message when LLM fails."""
-        return f"""
-Hola,
+    async def arun(
+        self,
+        context: Context,
+        template_text: str,
+        max_output_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Async twin of `run`; `max_output_tokens` overrides `max_tokens`.
+        """
+        try:
+            return await self.runner.arun_text(
+                system_prompt=OUTREACH_SYSTEM_PROMPT,
+                user_content=template_text,
+                max_output_tokens=max_output_tokens,
+            )
+        except Exception as exc:
+            print(f"Outreach error: {exc}")
+            return self._fallback_message(context)
 
-Esperamos que estés disfrutando tu vehículo.
+    async def run_many(self, contexts: List[Context], templates: List[str]) -> List[str]:
+        """
+        Generate outreach messages for many customers concurrently.
 
-Queremos asegurarnos de que todo esté bien. Si tienes alguna duda o necesitas soporte, estamos aquí para ayudarte.
+        Requests overlap up to the runner's `max_concurrency` (and RPM/TPM
+        budgets, if set) and are binned by predicted reply length (see
+        `_predict_max_tokens`); failures fall back per customer like `run`.
 
-Responde a este mensaje o contáctanos por {context.channel_pref}.
+        Args:
+            contexts: Customer contexts
+            templates: Template prompts, aligned with `contexts`
 
-Saludos,
-Equipo Kavak
-""".strip()
+        Returns:
+            Final message texts, aligned with `contexts`
+        """
+        return await _run_binned(self, contexts, templates)
+
+    def run_batch(self, contexts: List[Context], template_texts: List[str]) -> List[str]:
+        """
+        Generate outreach messages for many customers, several per request.
+
+        Prompts are sent `OUTREACH_BATCH_SIZE` at a time under the unchanged
+        system prompt, so it is paid once per batch instead of once per
+        customer; any customer the model fails to return falls back to `run`.
+
+        Args:
+            contexts: Customer contexts
+            template_texts: Template prompts, aligned with `contexts`
+
+        Returns:
+            Final message texts, aligned with `contexts`
+        """
+        messages: List[str] = []
+        for start in range(0, len(contexts), OUTREACH_BATCH_SIZE):
+            batch_contexts = contexts[start:start + OUTREACH_BATCH_SIZE]
+            batch_texts = template_texts[start:start + OUTREACH_BATCH_SIZE]
+            generated = self._generate_batch(batch_texts)
+            for context, text, message in zip(batch_contexts, batch_texts, generated):
+                messages.append(message if message is not None else self.run(context, text))
+        return messages
+
+    def _generate_batch(self, template_texts: List[str]) -> List[Optional[str]]:
+        """Generate one batch in a single request; None marks customers to retry alone."""
+        items = "\n".join(
+            f"### CLIENTE id={item_id}\n{text}"
+            for item_id, text in enumerate(template_texts)
+        )
+        try:
+            payload = self.batch_runner.run_json(
+                system_prompt=OUTREACH_SYSTEM_PROMPT,
+                user_content=f"{OUTREACH_BATCH_INSTRUCTIONS}\n{items}",
+            )
+            raw_items = payload["items"]
+        except Exception as exc:
+            print(f"Outreach batch error: {exc}")
+            return [None] * len(template_texts)
+
+        results: List[Optional[str]] = [None] * len(template_texts)
+        for raw in raw_items if isinstance(raw_items, list) else ():
+            try:
+                item_id = int(raw["id"])
+                message = raw["message"].strip()
+                if 0 <= item_id < len(template_texts) and message:
+                    results[item_id] = message
+            except Exception:
+                continue
+        return results
+
+    def _fallback_message(self, context: Context) -> str:
+        """Fallback message when LLM fails."""
+        return _OUTREACH_FALLBACK.substitute(channel=context.channel_pref)
@@ -2,8 +2,15 @@
 Safety: Content filtering and compliance checks.
 Blocks PII, prohibited terms, and policy violations.
 """
+import os
 import re
-from typing import Tuple, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Tuple, List
+
+try:  # Optional: linear-time matching via Google RE2 (pip install google-re2)
+    import re2  # type: ignore
+except Exception:  # pragma: no cover
+    re2 = None  # type: ignore
 
 
 # Prohibited terms (legal, guarantees, etc.)
@@ -31,6 +38,40 @@ PII_PATTERNS = [
 # Compensation limits (as regex for amounts)
 MAX_COMPENSATION_PERCENT = 20  # Max 20% discount/compensation
 
+# Language that blames the customer
+BLAME_PATTERNS = [
+    r'\btu culpa\b',
+    r'\bno leíste\b',
+    r'\btu error\b',
+    r'\btu responsabilidad\b',
+    r'\bdebiste\b.*\bantes\b',
+    r'\bno debiste\b',
+]
+
+# Patterns used on every message are compiled once at import.
+_BLAME_RE = re.compile("|".join(BLAME_PATTERNS), re.IGNORECASE)
+_COMPENSATION_RE = re.compile(
+    r'(\d+)%?\s*(?:descuento|compensación|cupón|reembolso)', re.IGNORECASE
+)
+_GREETING_RE = re.compile(r'^(?:hola|estimad[oa]|buen[oa]s?|apreciad[oa])\b', re.IGNORECASE)
+_CLOSING_RE = re.compile(
+    r'\b(?:atentamente|saludos|gracias|cordialmente)\b'
+    r'|\bequipo\s+kavak\b'
+    r'|\batención\s+al\s+cliente\b',
+    re.IGNORECASE,
+)
+_NEXT_STEP_RE = re.compile(
+    r'\bcontactar[ée]\b'
+    r'|\bresponder\b'
+    r'|\bllamar\b'
+    r'|\b(?:te|le)\s+(?:contactaremos|llamaremos|escribiremos)\b'
+    r'|\bpróxim[oa]s?\b'
+    r'|\b\d+\s*(?:horas?|días?)\b'
+    r'|\bhoy\b'
+    r'|\bmañana\b',
+    re.IGNORECASE,
+)
+
 
 class SafetyChecker:
     """Content safety and compliance checker."""
@@ -54,6 +95,28 @@ class SafetyChecker:
         self.prohibited_re = [re.compile(p, re.IGNORECASE) for p in self.prohibited_terms]
         self.pii_re = [re.compile(p, re.IGNORECASE) for p in self.pii_patterns]
 
+        # One alternation per category so `check` scans the text once each;
+        # the named group that matched tells which pattern fired.
+        self._pii_union = self._compile_union(self.pii_patterns)
+        self._prohibited_union = self._compile_union(self.prohibited_terms)
+
+    @staticmethod
+    def _compile_union(patterns: List[str]) -> Any:
+        """
+        Compile `patterns` into one case-insensitive alternation of `(?P<p{i}>...)` groups.
+
+        Uses RE2 when installed, which scans in linear time with no
+        backtracking. Unions RE2 can't compile (e.g. the lookahead in the
+        phone PII pattern) fall back to `re`.
+        """
+        union = "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patterns))
+        if re2 is not None:
+            try:
+                return re2.compile(f"(?i){union}")
+            except Exception:
+                pass
+        return re.compile(union, re.IGNORECASE)
+
     def check(self, text: str) -> Tuple[bool, str]:
         """
         Check if text passes safety filters.
@@ -65,14 +128,62 @@ class SafetyChecker:
             Tuple of (is_safe, reason)
         """
         # Check for PII
-        for pattern in self.pii_re:
-            if pattern.search(text):
-                return False, "blocked: PII detected"
+        if self._pii_union.search(text):
+            return False, "blocked: PII detected"
+
+        return self._check_content(text)
+
+    def check_batch(
+        self, texts: List[str], max_workers: Optional[int] = None
+    ) -> List[Tuple[bool, str]]:
+        """
+        `check` every text in `texts`, preserving order.
+
+        RE2 releases the GIL while matching, so with it installed the texts are
+        spread over a thread pool (`max_workers` defaults to the CPU count).
+        The stdlib `re` holds the GIL, so without RE2 threads would only add
+        overhead and the texts are checked in turn.
+
+        Args:
+            texts: Message texts to check
+            max_workers: Thread pool size
+
+        Returns:
+            List of (is_safe, reason), aligned with `texts`
+        """
+        if re2 is None or len(texts) < 2:
+            return [self.check(text) for text in texts]
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            return list(pool.map(self.check, texts))
 
+    def check_and_sanitize(self, text: str) -> Tuple[bool, str, str]:
+        """
+        `check` and PII redaction in one pass over the text.
+
+        PII is detected by the same substitution that masks it, so the text
+        is not scanned once for `check` and again for `sanitize`.
+
+        Args:
+            text: Message text to check
+
+        Returns:
+            Tuple of (is_safe, reason, sanitized_text)
+        """
+        sanitized, n_pii = self._pii_union.subn('[REDACTED]', text)
+        if n_pii:
+            return False, "blocked: PII detected", sanitized
+
+        is_safe, reason = self._check_content(text)
+        return is_safe, reason, text
+
+    def _check_content(self, text: str) -> Tuple[bool, str]:
+        """Checks that run after PII: prohibited terms, tone and compensation."""
         # Check for prohibited terms
-        for pattern in self.prohibited_re:
-            if pattern.search(text):
-                return False, f"blocked: prohibited term '{pattern.pattern}'"
+        match = self._prohibited_union.search(text)
+        if match:
+            term = self.prohibited_terms[int(match.lastgroup[1:])]
+            return False, f"blocked: prohibited term '{term}'"
 
         # Check tone (basic heuristics)
         if self._has_blame_language(text):
@@ -94,20 +205,7 @@ class SafetyChecker:
         Returns:
             True if blame language detected
         """
-        blame_patterns = [
-            r'\btu culpa\b',
-            r'\bno leíste\b',
-            r'\btu error\b',
-            r'\btu responsabilidad\b',
-            r'\bdebiste\b.*\bantes\b',
-            r'\bno debiste\b',
-        ]
-
-        for pattern in blame_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-
-        return False
+        return _BLAME_RE.search(text) is not None
 
     def _check_compensation(self, text: str) -> bool:
         """
@@ -120,8 +218,7 @@ class SafetyChecker:
             True if within limits or no compensation mentioned
         """
         # Look for percentage discounts/compensations
-        percent_pattern = r'(\d+)%?\s*(?:descuento|compensación|cupón|reembolso)'
-        matches = re.findall(percent_pattern, text, re.IGNORECASE)
+        matches = _COMPENSATION_RE.findall(text)
 
         for match in matches:
             try:
@@ -190,37 +287,16 @@ class ToneValidator:
     @staticmethod
     def _has_greeting(text: str) -> bool:
         """Check if text has greeting."""
-        greetings = [
-            r'^hola\b',
-            r'^estimad[oa]\b',
-            r'^buen[oa]s?\b',
-            r'^apreciad[oa]\b',
-        ]
-        first_line = text.split('\n')[0].lower()
-        return any(re.search(p, first_line) for p in greetings)
+        first_line = text.partition('\n')[0]
+        return _GREETING_RE.search(first_line) is not None
 
     @staticmethod
     def _has_closing(text: str) -> bool:
         """Check if text has closing."""
-        closings = [
-            r'\b(?:atentamente|saludos|gracias|cordialmente)\b',
-            r'\bequipo\s+kavak\b',
-            r'\batención\s+al\s+cliente\b',
-        ]
-        last_lines = '\n'.join(text.split('\n')[-3:]).lower()
-        return any(re.search(p, last_lines) for p in closings)
+        last_lines = '\n'.join(text.rsplit('\n', 3)[-3:])
+        return _CLOSING_RE.search(last_lines) is not None
 
     @staticmethod
     def _has_next_step(text: str) -> bool:
         """Check if text has clear next step."""
-        next_step_indicators = [
-            r'\bcontactar[ée]\b',
-            r'\bresponder\b',
-            r'\bllamar\b',
-            r'\b(?:te|le)\s+(?:contactaremos|llamaremos|escribiremos)\b',
-            r'\bpróxim[oa]s?\b',
-            r'\b\d+\s*(?:horas?|días?)\b',
-            r'\bhoy\b',
-            r'\bmañana\b',
-        ]
-        return any(re.search(p, text, re.IGNORECASE) for p in next_step_indicators)
+        return _NEXT_STEP_RE.search(text) is not None
@@ -13,13 +13,16 @@ class StateBuilder:
         """
         Build context from customer data.
 
+        `Customer` is already validated and `Context` is a plain projection of
+        it, so the model is built with `model_construct` (no re-validation).
+
         Args:
             customer: Customer object with all attributes
 
         Returns:
             Context object ready for agent consumption
         """
-        return Context(
+        return Context.model_construct(
             customer_id=customer.customer_id,
             segment=customer.segment,
             is_vocal=customer.is_vocal,
@@ -2,9 +2,69 @@
 Template Factory: Fills template slots with customer context.
 Provides base drafts for agents to refine.
 """
+import functools
+import operator
+
 from app.models import Context, Template
 from app.templates import get_template
 
+# Context fields rendered into the prompt, in order; also the `fill` cache key.
+_CONTEXT_FIELDS = operator.attrgetter(
+    'customer_id', 'segment', 'mini_story', 'last_purchase_days', 'price',
+    'past_NPS', 'churn_risk_est', 'channel_pref', 'issue_bucket', 'first_message',
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _static_prefix(template_id: str) -> str:
+    """
+    Template-only part of the prompt (name, slots, guardrails, instructions).
+
+    It depends on `template_id` alone, so it is built once per template and
+    leads the prompt: every customer served with the same template shares it
+    byte for byte, which is what provider prompt caching matches on.
+    """
+    template: Template = get_template(template_id)
+    guardrails = "\n".join(f"- {g}" for g in template.guardrails)
+    return f"""
+Usa la plantilla '{template.name}' (ID: {template.id}) para responder.
+
+ESTRUCTURA DE LA PLANTILLA:
+Slots requeridos: {', '.join(template.slots)}
+
+GUARDRAILS:
+{guardrails}
+
+INSTRUCCIONES:
+Rellena todos los slots de manera natural y personalizada según el contexto del cliente (abajo).
+Mantén el mensaje breve (máx 150 palabras), empático y orientado a acción.
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def _fill(template_id: str, fields: tuple) -> str:
+    """Render the prompt for `template_id` and the `_CONTEXT_FIELDS` values."""
+    (customer_id, segment, mini_story, last_purchase_days, price,
+     past_nps, churn_risk_est, channel_pref, issue_bucket, first_message) = fields
+
+    prompt = _static_prefix(template_id) + f"""
+CONTEXTO DEL CLIENTE:
+- ID: {customer_id}
+- Segmento: {segment}
+- Historia: {mini_story}
+- Días desde compra: {last_purchase_days}
+- Precio pagado: ${price:,.0f}
+- NPS previo: {past_nps}/10
+- Riesgo de churn: {churn_risk_est:.0%}
+- Canal preferido: {channel_pref}
+- Categoría: {issue_bucket}
+"""
+
+    if first_message:
+        prompt += f"- Mensaje del cliente: \"{first_message}\"\n"
+
+    return prompt
+
 
 class TemplateFactory:
     """Fills template slots with customer-specific information."""
@@ -14,6 +74,11 @@ class TemplateFactory:
         """
         Fill template with context information.
 
+        The static template block comes first and the customer context last,
+        so the shared prefix is as long as possible. Prompts are memoized per
+        (template, context values), so customers seen again in later
+        iterations reuse their prompt.
+
         Args:
             template_id: ID of template to use
             context: Customer context
@@ -21,38 +86,4 @@ class TemplateFactory:
         Returns:
             Draft message with template structure
         """
-        template = get_template(template_id)
-
-        # Create a prompt that describes the template and context
-        # This will be refined by the agent
-        prompt = f"""
-Usa la plantilla '{template.name}' (ID: {template.id}) para responder.
-
-CONTEXTO DEL CLIENTE:
-- ID: {context.customer_id}
-- Segmento: {context.segment}
-- Historia: {context.mini_story}
-- Días desde compra: {context.last_purchase_days}
-- Precio pagado: ${context.price:,.0f}
-- NPS previo: {context.past_NPS}/10
-- Riesgo de churn: {context.churn_risk_est:.0%}
-- Canal preferido: {context.channel_pref}
-- Categoría: {context.issue_bucket}
-"""
-
-        if context.first_message:
-            prompt += f"\n- Mensaje del cliente: \"{context.first_message}\"\n"
-
-        prompt += f"""
-ESTRUCTURA DE LA PLANTILLA:
-Slots requeridos: {', '.join(template.slots)}
-
-GUARDRAILS:
-{chr(10).join(f'- {g}' for g in template.guardrails)}
-
-INSTRUCCIONES:
-Rellena todos los slots de manera natural y personalizada según el contexto.
-Mantén el mensaje breve (máx 150 palabras), empático y orientado a acción.
-"""
-
-        return prompt
+        return _fill(template_id, _CONTEXT_FIELDS(context))
@@ -3,11 +3,13 @@ Data models and schemas for the Kavak customer service demo.
 Defines Pydantic models for type safety and validation.
 """
 from typing import Dict, Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Customer(BaseModel):
     """Customer data model matching the CSV schema."""
+    model_config = ConfigDict(frozen=True)
+
     customer_id: str
     segment: Literal["VF", "VE", "NVF", "NVE"]
     is_vocal: bool
@@ -24,6 +26,8 @@ class Customer(BaseModel):
 
 class Context(BaseModel):
     """Context passed to agents for message generation."""
+    model_config = ConfigDict(frozen=True)
+
     customer_id: str
     segment: str
     is_vocal: bool
@@ -40,6 +44,9 @@ class Context(BaseModel):
 
 class Score(BaseModel):
     """Judge evaluation score with strict validation."""
+    # Immutable: cached verdicts are shared between callers.
+    model_config = ConfigDict(frozen=True)
+
     NPS_expected: float = Field(ge=0, le=10)
     EngagementProb: float = Field(ge=0, le=1)
     ChurnProb: float = Field(ge=0, le=1)
@@ -56,6 +63,8 @@ class Score(BaseModel):
 
 class Template(BaseModel):
     """Template definition for message generation."""
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: str
     slots: list[str]
@@ -65,6 +74,8 @@ class Template(BaseModel):
 
 class InteractionLog(BaseModel):
     """Log entry for each customer interaction."""
+    model_config = ConfigDict(frozen=True)
+
     customer_id: str
     segment: str
     issue_bucket: str
@@ -3,6 +3,10 @@ Reward computation for bandit algorithm.
 Formula: R = 0.6*NPS + 0.3*(Engagement*10) - 0.3*(Churn*10)
 Normalized to [0, 1] range.
 """
+from typing import Sequence
+
+import numpy as np
+
 from app.models import Score
 
 
@@ -16,15 +20,31 @@ def compute_reward(score: Score) -> float:
     Returns:
         Reward value in [0, 1] range
     """
-    nps = float(score.NPS_expected)
-    eng = float(score.EngagementProb)
-    chrn = float(score.ChurnProb)
-
-    # Raw reward formula
-    r_raw = 0.6 * nps + 0.3 * (eng * 10) - 0.3 * (chrn * 10)
+    # Raw reward formula (fields are already validated floats; 0.3 * 10 folded to 3.0)
+    r_raw = 0.6 * score.NPS_expected + 3.0 * score.EngagementProb - 3.0 * score.ChurnProb
 
     # Normalize to [0, 1] range
     # Assuming r_raw range is approximately [0, 10]
-    r = max(0.0, min(1.0, r_raw / 10.0))
+    return max(0.0, min(1.0, r_raw * 0.1))
+
+
+def compute_reward_batch(scores: Sequence[Score]) -> np.ndarray:
+    """
+    Vectorized `compute_reward` for many scores at once.
+
+    Uses the same float64 arithmetic as the scalar version, so each entry
+    equals `compute_reward(score)` exactly.
+
+    Args:
+        scores: Score objects from Judge evaluations
+
+    Returns:
+        Array of rewards in [0, 1], aligned with `scores`
+    """
+    n = len(scores)
+    nps = np.fromiter((s.NPS_expected for s in scores), dtype=np.float64, count=n)
+    eng = np.fromiter((s.EngagementProb for s in scores), dtype=np.float64, count=n)
+    chrn = np.fromiter((s.ChurnProb for s in scores), dtype=np.float64, count=n)
 
-    return r
+    r_raw = 0.6 * nps + 3.0 * eng - 3.0 * chrn
+    return np.clip(r_raw * 0.1, 0.0, 1.0)
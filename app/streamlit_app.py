@@ -2,27 +2,30 @@
 Streamlit UI for Kavak Customer Service Demo.
 MVP with bandits + LLM evaluators.
 """
+import asyncio
 import os
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 # Import factories
+from app.factories.agents_runner import LRUCache, aclose_async_clients
 from app.factories.persona_forge import PersonaForge
 from app.factories.state_builder import StateBuilder
 from app.factories.template_factory import TemplateFactory
 from app.factories.responders import ResponderAgent, OutreachAgent
-from app.factories.judge import Judge
+from app.factories.judge import Judge, JUDGE_BATCH_SIZE
 from app.factories.policy_learner import ThompsonBandit, EpsilonGreedyBandit
 from app.factories.prioritizer import Prioritizer
 from app.factories.metrics import MetricsAggregator
 from app.factories.safety import SafetyChecker, ToneValidator
 
-from app.models import Customer, InteractionLog
+from app.models import Context, Customer, InteractionLog
 from app.templates import get_template_ids
-from app.scoring import compute_reward
+from app.scoring import compute_reward_batch
 
 
 # Page config
@@ -43,6 +46,99 @@ if 'iteration' not in st.session_state:
     st.session_state.iteration = 0
 if 'api_key_set' not in st.session_state:
     st.session_state.api_key_set = False
+if 'logs_version' not in st.session_state:
+    # Bumped whenever `logs` changes; keys the per-session derived caches.
+    st.session_state.logs_version = 0
+if 'vocal_customers' not in st.session_state:
+    # Partition + outreach ranking of `customers`, computed once per dataset.
+    st.session_state.vocal_customers = []
+    st.session_state.ranked_non_vocal = []
+if 'ctx_cache' not in st.session_state:
+    # customer_id -> Context; customers are immutable within a dataset.
+    st.session_state.ctx_cache = {}
+
+
+# Entries kept per shared response/verdict cache (see `_shared_cache`).
+SHARED_CACHE_SIZE = 10_000
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_cache(name: str, model: str) -> LRUCache:
+    """
+    LRU cache for one agent role and model, kept across iterations and reruns.
+
+    Keys are digests of the exact prompt (customer context, template/draft and
+    message), so a hit never reuses a response or verdict for a different
+    customer.
+    """
+    return LRUCache(SHARED_CACHE_SIZE)
+
+
+@st.cache_resource(show_spinner=False)
+def get_agents(responder_model: str, judge_model: str) -> Tuple[
+    ResponderAgent, OutreachAgent, Judge,
+    StateBuilder, TemplateFactory, SafetyChecker,
+]:
+    """
+    Agents and factories for one model pair, built once and reused.
+
+    Keeping them alive across iterations and reruns preserves their shared
+    response caches and the compiled safety patterns. Async OpenAI clients
+    are per event loop, so each iteration's `asyncio.run` opens (and closes)
+    its own.
+    """
+    return (
+        ResponderAgent(model=responder_model, cache=_shared_cache("responder", responder_model)),
+        OutreachAgent(model=responder_model, cache=_shared_cache("outreach", responder_model)),
+        Judge(model=judge_model, cache=_shared_cache("judge", judge_model)),
+        StateBuilder(),
+        TemplateFactory(),
+        SafetyChecker(),
+    )
+
+
+def _memo_on_logs(key: str, build: Callable[[], Any]) -> Any:
+    """Return `build()` memoized in session state until `logs_version` changes."""
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != st.session_state.logs_version:
+        cached = (st.session_state.logs_version, build())
+        st.session_state[key] = cached
+    return cached[1]
+
+
+def get_metrics() -> Dict[str, Any]:
+    """
+    Aggregated metrics for the current logs, recomputed only when they change.
+
+    Memoized in session state on `logs_version`, so widget interactions and
+    tab renders reuse one aggregation instead of redoing it per tab.
+    """
+    return _memo_on_logs(
+        'metrics_cache',
+        lambda: MetricsAggregator.aggregate(st.session_state.logs)
+    )
+
+
+def _build_logs_df(logs: List[InteractionLog]) -> pd.DataFrame:
+    """Columnar view of the log fields the tabs chart and filter on; `pos` indexes back into `logs`."""
+    segments, arms, issues, kinds, rewards = zip(*(
+        (log.segment, log.arm, log.issue_bucket, log.interaction_type, log.reward)
+        for log in logs
+    )) if logs else ((), (), (), (), ())
+    return pd.DataFrame({
+        'segment': pd.Categorical(segments),
+        'arm': pd.Categorical(arms),
+        'issue_bucket': pd.Categorical(issues),
+        'interaction_type': pd.Categorical(kinds),
+        # float32 halves what plotly has to serialize; rewards live in [0, 1]
+        'reward': np.asarray(rewards, dtype=np.float32),
+        'pos': np.arange(len(logs)),
+    })
+
+
+def get_logs_df() -> pd.DataFrame:
+    """Log DataFrame for filtering, rebuilt only when `logs_version` changes."""
+    return _memo_on_logs('logs_df_cache', lambda: _build_logs_df(st.session_state.logs))
 
 
 def check_api_key():
@@ -50,11 +146,10 @@ def check_api_key():
     if not os.getenv("OPENAI_API_KEY"):
         st.sidebar.error("⚠️ OPENAI_API_KEY no configurada")
         api_key = st.sidebar.text_input("OpenAI API Key", type="password")
-        if api_key:
-            os.environ["OPENAI_API_KEY"] = api_key
-            st.session_state.api_key_set = True
-            st.rerun()
-        return False
+        if not api_key:
+            return False
+        # Continue with this run; the key is read when agents are built.
+        os.environ["OPENAI_API_KEY"] = api_key
     st.session_state.api_key_set = True
     return True
 
@@ -118,7 +213,16 @@ def main():
                 forge = PersonaForge(seed=42)
                 customers = forge.generate(n=n_customers)
                 st.session_state.customers = customers
+                st.session_state.ctx_cache = {}
+
+                # Vocal customers get a response; non-vocal ones are ranked once
+                # in full, so any "Top N" is a prefix of this list.
+                st.session_state.vocal_customers = [c for c in customers if c.is_vocal]
+                st.session_state.ranked_non_vocal = Prioritizer().rank(
+                    [c for c in customers if not c.is_vocal]
+                )
                 st.session_state.logs = []
+                st.session_state.logs_version += 1
                 st.session_state.iteration = 0
 
                 # Initialize policy
@@ -128,8 +232,8 @@ def main():
                 else:
                     st.session_state.policy = EpsilonGreedyBandit(arms=template_ids, epsilon=0.1)
 
-                st.success(f"✅ {len(customers)} clientes generados")
-                st.rerun()
+            # Widgets below (and the tabs) render from the updated state in this run
+            st.toast(f"✅ {len(customers)} clientes generados")
 
         if st.button("▶️ Ejecutar Iteración", use_container_width=True, disabled=len(st.session_state.customers) == 0):
             run_iteration(
@@ -151,8 +255,11 @@ def main():
         "🎯 Recomendaciones"
     ])
 
+    # Aggregate once per render; every tab reads the same result
+    metrics = get_metrics()
+
     with tab1:
-        show_dashboard()
+        show_dashboard(metrics)
 
     with tab2:
         show_conversations()
@@ -161,16 +268,15 @@ def main():
         show_outreach()
 
     with tab4:
-        show_metrics()
+        show_metrics(metrics)
 
     with tab5:
-        show_recommendations()
+        show_recommendations(metrics)
 
 
 def run_iteration(responder_model: str, judge_model: str, outreach_n: int):
     """Run one iteration of the bandit algorithm."""
     with st.spinner("Ejecutando iteración..."):
-        customers = st.session_state.customers
         policy = st.session_state.policy
         logs = st.session_state.logs
 
@@ -178,123 +284,178 @@ def run_iteration(responder_model: str, judge_model: str, outreach_n: int):
         st.session_state.iteration += 1
         current_iteration = st.session_state.iteration
 
-        # Initialize agents
-        responder = ResponderAgent(model=responder_model)
-        outreach = OutreachAgent(model=responder_model)
-        judge = Judge(model=judge_model)
-        state_builder = StateBuilder()
-        template_factory = TemplateFactory()
-        prioritizer = Prioritizer()
-        safety = SafetyChecker()
-
-        # Process vocal customers
-        vocal_customers = [c for c in customers if c.is_vocal]
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        total_tasks = len(vocal_customers) + outreach_n
-        completed = 0
-
-        for customer in vocal_customers:
-            status_text.text(f"Procesando vocal: {customer.customer_id}...")
-
-            # Build context
-            ctx = state_builder.build(customer)
-
-            # Select template (arm)
+        (
+            responder, outreach, judge,
+            state_builder, template_factory, safety,
+        ) = get_agents(responder_model, judge_model)
+
+        # Vocal customers get a response; top-ranked non-vocal ones get outreach
+        vocal_customers = st.session_state.vocal_customers
+        ranked = st.session_state.ranked_non_vocal[:outreach_n]
+
+        # Select every arm up front on this thread; the posteriors are only
+        # updated after all LLM calls return (see below).
+        # Contexts are built once per customer per dataset, then reused.
+        ctx_cache = st.session_state.ctx_cache
+        jobs = []
+        for customer, agent, interaction_type in (
+            [(c, responder, "vocal") for c in vocal_customers]
+            + [(c, outreach, "outreach") for c in ranked]
+        ):
+            ctx = ctx_cache.get(customer.customer_id)
+            if ctx is None:
+                ctx = ctx_cache[customer.customer_id] = state_builder.build(customer)
             context_key = (customer.segment, customer.issue_bucket or "atencion")
             arm = policy.select(context=context_key)
+            jobs.append((customer, ctx, arm, agent, interaction_type))
 
-            # Fill template
-            draft = template_factory.fill(arm, ctx)
-
-            # Generate response
-            message = responder.run(ctx, draft)
-
-            # Safety check
-            is_safe, reason = safety.check(message)
-            if not is_safe:
-                # Fallback to safe message
-                message = responder._fallback_message(ctx)
-
-            # Evaluate
-            score = judge.run(ctx, message)
-
-            # Compute reward
-            reward = compute_reward(score)
-
-            # Update policy
-            policy.update(arm, reward, context=context_key)
-
-            # Log
-            log = InteractionLog(
-                customer_id=customer.customer_id,
-                segment=customer.segment,
-                issue_bucket=customer.issue_bucket or "atencion",
-                arm=arm,
-                message=message,
-                score=score,
-                reward=reward,
-                iteration=current_iteration,
-                interaction_type="vocal"
-            )
-            logs.append(log)
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        # Two steps per customer: message generated, then judged
+        total_tasks = 2 * len(jobs)
+        completed = 0
 
+        def on_progress(status: str):
+            nonlocal completed
             completed += 1
+            status_text.text(status)
             progress_bar.progress(completed / total_tasks)
 
-        # Process non-vocal (outreach)
-        non_vocal = [c for c in customers if not c.is_vocal]
-        ranked = prioritizer.rank(non_vocal, top_n=outreach_n)
-
-        for customer in ranked:
-            status_text.text(f"Procesando outreach: {customer.customer_id}...")
-
-            ctx = state_builder.build(customer)
-            context_key = (customer.segment, customer.issue_bucket or "atencion")
-            arm = policy.select(context=context_key)
-
-            draft = template_factory.fill(arm, ctx)
-            message = outreach.run(ctx, draft)
-
-            # Safety check
-            is_safe, reason = safety.check(message)
-            if not is_safe:
-                message = outreach._fallback_message(ctx)
+        # Running reward per arm, redrawn as each judge batch lands
+        partial_view = st.empty()
+        partial_rewards: Dict[str, List[float]] = {}
+
+        def on_logs(batch: List[InteractionLog]):
+            for log in batch:
+                partial_rewards.setdefault(log.arm, []).append(log.reward)
+            partial_view.dataframe(
+                pd.DataFrame(
+                    [(arm, np.mean(r), len(r)) for arm, r in partial_rewards.items()],
+                    columns=['arm', 'reward', 'n'],
+                ).sort_values('reward', ascending=False),
+                hide_index=True,
+                use_container_width=True,
+            )
 
-            # Evaluate
-            score = judge.run(ctx, message)
-            reward = compute_reward(score)
+        # Responder + safety for every customer concurrently, then batched judging
+        new_logs = asyncio.run(_closing_clients(_run_interactions(
+            jobs,
+            judge=judge,
+            safety=safety,
+            template_factory=template_factory,
+            iteration=current_iteration,
+            on_progress=on_progress,
+            on_logs=on_logs,
+        )))
+
+        # Update the policy once all calls are back: one scatter-add per
+        # context, in customer order (same sums as per-log `update` calls)
+        by_context: Dict[Tuple[str, str], List[InteractionLog]] = {}
+        for log in new_logs:
+            by_context.setdefault((log.segment, log.issue_bucket), []).append(log)
+        for context_key, group in by_context.items():
+            policy.update_batch(
+                policy.arm_indices([log.arm for log in group]),
+                np.fromiter((log.reward for log in group), dtype=np.float64, count=len(group)),
+                context=context_key,
+            )
+        logs.extend(new_logs)
+        st.session_state.logs_version += 1
 
-            # Update policy
-            policy.update(arm, reward, context=context_key)
+        progress_bar.empty()
+        status_text.empty()
+        partial_view.empty()
 
-            # Log
-            log = InteractionLog(
+        st.session_state.logs = logs
+    st.toast(f"✅ Iteración {current_iteration} completada!")
+
+
+async def _closing_clients(coro: Awaitable[Any]) -> Any:
+    """Await `coro`, then close the async clients it opened on this loop."""
+    try:
+        return await coro
+    finally:
+        await aclose_async_clients()
+
+
+async def _run_interactions(
+    jobs: List[Tuple[Customer, Context, str, object, str]],
+    *,
+    judge: Judge,
+    safety: SafetyChecker,
+    template_factory: TemplateFactory,
+    iteration: int,
+    on_progress: Optional[Callable[[str], None]] = None,
+    on_logs: Optional[Callable[[List[InteractionLog]], None]] = None,
+) -> List[InteractionLog]:
+    """
+    Generate, safety-check and judge the message for every job.
+
+    Each job is `(customer, ctx, arm, agent, interaction_type)`. Messages are
+    generated concurrently (the agents' runners cap requests in flight), then
+    judged `JUDGE_BATCH_SIZE` per request with customers grouped by segment.
+    `on_logs` receives each judged batch as soon as it is back; the returned
+    logs are in job order.
+    """
+    def report(status: str):
+        if on_progress is not None:
+            on_progress(status)
+
+    async def generate(customer, ctx, arm, agent, interaction_type) -> str:
+        # Fill template and generate the message
+        draft = template_factory.fill(arm, ctx)
+        message = await agent.arun(ctx, draft)
+
+        # Safety check
+        is_safe, reason = safety.check(message)
+        if not is_safe:
+            # Fallback to safe message
+            message = agent._fallback_message(ctx)
+
+        report(f"Mensaje {interaction_type}: {customer.customer_id}...")
+        return message
+
+    messages = await asyncio.gather(*(generate(*job) for job in jobs))
+
+    logs: List[Optional[InteractionLog]] = [None] * len(jobs)
+
+    async def judge_group(positions: List[int]):
+        scores = await judge.arun_batch([(jobs[pos][1], messages[pos]) for pos in positions])
+        rewards = compute_reward_batch(scores).tolist()
+        batch = []
+        for pos, score, reward in zip(positions, scores, rewards):
+            customer, _, arm, _, interaction_type = jobs[pos]
+            logs[pos] = InteractionLog(
                 customer_id=customer.customer_id,
                 segment=customer.segment,
                 issue_bucket=customer.issue_bucket or "atencion",
                 arm=arm,
-                message=message,
+                message=messages[pos],
                 score=score,
                 reward=reward,
-                iteration=current_iteration,
-                interaction_type="outreach"
+                iteration=iteration,
+                interaction_type=interaction_type
             )
-            logs.append(log)
-
-            completed += 1
-            progress_bar.progress(completed / total_tasks)
-
-        progress_bar.empty()
-        status_text.empty()
-
-        st.session_state.logs = logs
-        st.success(f"✅ Iteración {current_iteration} completada!")
-        st.rerun()
-
-
-def show_dashboard():
+            batch.append(logs[pos])
+            report(f"Evaluado: {customer.customer_id}...")
+        if on_logs is not None:
+            on_logs(batch)
+
+    # Evaluate: one judge request per JUDGE_BATCH_SIZE customers of a segment,
+    # all requests concurrently
+    by_segment: dict = {}
+    for pos, job in enumerate(jobs):
+        by_segment.setdefault(job[0].segment, []).append(pos)
+    await asyncio.gather(*(
+        judge_group(positions[start:start + JUDGE_BATCH_SIZE])
+        for positions in by_segment.values()
+        for start in range(0, len(positions), JUDGE_BATCH_SIZE)
+    ))
+
+    return logs
+
+
+def show_dashboard(metrics: Dict[str, Any]):
     """Show main dashboard."""
     st.header("📊 Dashboard Principal")
 
@@ -303,7 +464,6 @@ def show_dashboard():
         return
 
     logs = st.session_state.logs
-    metrics = MetricsAggregator.aggregate(logs)
 
     # KPIs
     col1, col2, col3, col4 = st.columns(4)
@@ -324,11 +484,16 @@ def show_dashboard():
     with col1:
         st.subheader("Reward por Plantilla")
         if logs:
-            df = pd.DataFrame([{
-                'arm': log.arm,
-                'reward': log.reward
-            } for log in logs])
-            fig = px.box(df, x='arm', y='reward', color='arm')
+            logs_df = get_logs_df()
+            arm_codes = logs_df['arm'].cat.codes.to_numpy()
+            rewards = logs_df['reward'].to_numpy()
+            # One box per arm straight from the arrays (what px.box(color=...)
+            # would build after regrouping the frame)
+            fig = go.Figure([
+                go.Box(y=rewards[arm_codes == code], name=arm)
+                for code, arm in enumerate(logs_df['arm'].cat.categories)
+            ])
+            fig.update_layout(xaxis_title="arm", yaxis_title="reward")
             st.plotly_chart(fig, use_container_width=True)
 
     with col2:
@@ -336,7 +501,7 @@ def show_dashboard():
         arm_dist = metrics['arm_distribution']
         if arm_dist:
             fig = px.pie(
-                values=list(arm_dist.values()),
+                values=np.fromiter(arm_dist.values(), dtype=np.float64, count=len(arm_dist)),
                 names=list(arm_dist.keys()),
                 title="% Uso de cada plantilla"
             )
@@ -345,21 +510,22 @@ def show_dashboard():
     # Evolution over iterations
     if 'by_iteration' in metrics and metrics['by_iteration']:
         st.subheader("Evolución por Iteración")
-        iter_df = pd.DataFrame(metrics['by_iteration']).T
-        iter_df.reset_index(inplace=True)
-        iter_df.rename(columns={'index': 'iteration'}, inplace=True)
+        iterations, series = _memo_on_logs(
+            'iteration_series_cache',
+            lambda: _iteration_series(metrics['by_iteration'])
+        )
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=iter_df['iteration'],
-            y=iter_df['reward'],
+            x=iterations,
+            y=series[:, 0],
             mode='lines+markers',
             name='Reward',
             line=dict(color='blue')
         ))
         fig.add_trace(go.Scatter(
-            x=iter_df['iteration'],
-            y=iter_df['NPS_expected'] / 10,  # Normalize to [0,1]
+            x=iterations,
+            y=series[:, 1],
             mode='lines+markers',
             name='NPS (norm)',
             line=dict(color='green')
@@ -372,47 +538,67 @@ def show_dashboard():
         st.plotly_chart(fig, use_container_width=True)
 
 
+def _iteration_series(by_iteration: Dict[str, Dict[int, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Iteration numbers and an `(n_iter, 2)` array of reward and NPS normalized to [0, 1]."""
+    rewards = by_iteration['reward']
+    iterations = np.fromiter(rewards.keys(), dtype=np.int32, count=len(rewards))
+    series = np.empty((len(rewards), 2), dtype=np.float32)
+    series[:, 0] = np.fromiter(rewards.values(), dtype=np.float64, count=len(rewards))
+    series[:, 1] = np.fromiter(
+        (by_iteration['NPS_expected'][i] for i in rewards), dtype=np.float64, count=len(rewards)
+    ) / 10
+    return iterations, series
+
+
+@st.fragment
 def show_conversations():
-    """Show conversation logs (vocal customers)."""
+    """
+    Show conversation logs (vocal customers).
+
+    Runs as a fragment, so changing a filter reruns only this tab.
+    """
     st.header("💬 Conversaciones (Clientes Vocales)")
 
     if not st.session_state.logs:
         st.info("No hay conversaciones aún")
         return
 
-    vocal_logs = [log for log in st.session_state.logs if log.interaction_type == "vocal"]
+    logs = st.session_state.logs
+    logs_df = get_logs_df()
+    vocal_df = logs_df[logs_df['interaction_type'] == "vocal"]
 
-    if not vocal_logs:
+    if vocal_df.empty:
         st.info("No hay conversaciones vocales aún")
         return
 
     # Filters
     col1, col2, col3 = st.columns(3)
     with col1:
-        segments = list(set(log.segment for log in vocal_logs))
+        segments = vocal_df['segment'].unique().tolist()
         selected_segment = st.selectbox("Segmento", ["Todos"] + segments)
 
     with col2:
-        arms = list(set(log.arm for log in vocal_logs))
+        arms = vocal_df['arm'].unique().tolist()
         selected_arm = st.selectbox("Plantilla", ["Todas"] + arms)
 
     with col3:
-        issues = list(set(log.issue_bucket for log in vocal_logs))
+        issues = vocal_df['issue_bucket'].unique().tolist()
         selected_issue = st.selectbox("Issue", ["Todos"] + issues)
 
-    # Filter logs
-    filtered_logs = vocal_logs
+    # Filter logs with one combined boolean mask
+    mask = np.ones(len(vocal_df), dtype=bool)
     if selected_segment != "Todos":
-        filtered_logs = [log for log in filtered_logs if log.segment == selected_segment]
+        mask &= (vocal_df['segment'] == selected_segment).to_numpy()
     if selected_arm != "Todas":
-        filtered_logs = [log for log in filtered_logs if log.arm == selected_arm]
+        mask &= (vocal_df['arm'] == selected_arm).to_numpy()
     if selected_issue != "Todos":
-        filtered_logs = [log for log in filtered_logs if log.issue_bucket == selected_issue]
+        mask &= (vocal_df['issue_bucket'] == selected_issue).to_numpy()
+    positions = vocal_df['pos'].to_numpy()[mask]
 
-    st.caption(f"Mostrando {len(filtered_logs)} conversaciones")
+    st.caption(f"Mostrando {len(positions)} conversaciones")
 
     # Display conversations
-    for log in filtered_logs[-20:]:  # Show last 20
+    for log in (logs[i] for i in positions[-20:]):  # Show last 20
         with st.expander(f"{log.customer_id} - {log.arm} - Reward: {log.reward:.3f}"):
             col1, col2 = st.columns([2, 1])
 
@@ -460,7 +646,7 @@ def show_outreach():
                 st.metric("Churn", f"{log.score.ChurnProb:.1%}")
 
 
-def show_metrics():
+def show_metrics(metrics: Dict[str, Any]):
     """Show detailed metrics."""
     st.header("📈 Métricas Detalladas")
 
@@ -468,8 +654,6 @@ def show_metrics():
         st.info("No hay métricas aún")
         return
 
-    metrics = MetricsAggregator.aggregate(st.session_state.logs)
-
     # By segment
     st.subheader("Por Segmento")
     if metrics['by_segment']:
@@ -497,7 +681,7 @@ def show_metrics():
         st.dataframe(stats_df, use_container_width=True)
 
 
-def show_recommendations():
+def show_recommendations(metrics: Dict[str, Any]):
     """Show insights and recommendations."""
     st.header("🎯 Recomendaciones e Insights")
 
@@ -505,8 +689,6 @@ def show_recommendations():
         st.info("No hay recomendaciones aún")
         return
 
-    metrics = MetricsAggregator.aggregate(st.session_state.logs)
-
     st.subheader("📌 Top Insights")
     insights = metrics.get('insights', [])
 
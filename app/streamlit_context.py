@@ -9,15 +9,23 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 
+try:  # Optional: faster JSON encode/decode for saved runs (pip install orjson)
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
 from context_engineering.experiment import run_experiment
 from context_engineering.prompt_tuner import PromptTunerAgent
 from context_engineering.example_runner import load_profiles
 from context_engineering.persistence import (
+    HISTORY_FILE,
+    PROMPT_OVERRIDES_FILE,
+    RUN_STATE_FILE,
+    STRATEGY_FILE,
     get_next_run_number,
     load_history_df,
     load_strategy_insights,
@@ -29,18 +37,122 @@ from context_engineering.persistence import (
 
 DEFAULT_PROFILES_DIR = Path("personas_output")
 RESULTS_DIR = Path("results")
+PROFILE_TABLE_COLUMNS = [
+    "customer_id",
+    "cohort.vocal",
+    "cohort.satisfied",
+    "persona.name",
+    "persona.bio",
+    "purchase.vehicle",
+    "purchase.price",
+    "risk_signals.churn_est",
+    "risk_signals.ltv_apriori",
+]
+# Past this many runs the run filter becomes a range slider instead of a multiselect.
+MAX_RUN_MULTISELECT_OPTIONS = 50
+DEFAULT_RECENT_RUNS = 10
+
+
+def _file_stamp(path: Path) -> tuple:
+    """(mtime, size) of `path`, or None when missing; changes whenever the file is rewritten."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Disk loaders keyed on the backing file's stamp: reruns reuse the parsed
+# result and any write to the file invalidates it.
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_history_df(stamp) -> pd.DataFrame:
+    return load_history_df()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_strategy_insights(stamp) -> Dict:
+    return load_strategy_insights()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_prompt_overrides(stamp) -> Dict:
+    return load_prompt_overrides()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _get_next_run_number(stamp) -> int:
+    return get_next_run_number()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_profiles(path: str, stamp) -> list:
+    return load_profiles(Path(path))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _list_result_files(stamp) -> list:
+    # The directory's stamp changes whenever a file is added, removed or renamed.
+    if stamp is None:
+        return []
+    # scandir entries carry the file type, so no per-file stat() is needed.
+    with os.scandir(RESULTS_DIR) as entries:
+        return sorted(entry.name for entry in entries if entry.name.endswith(".json") and entry.is_file())
+
+
+def cached_history_df() -> pd.DataFrame:
+    return _load_history_df(_file_stamp(HISTORY_FILE))
+
+
+def cached_strategy_insights() -> Dict:
+    return _load_strategy_insights(_file_stamp(STRATEGY_FILE))
+
+
+def cached_prompt_overrides() -> Dict:
+    return _load_prompt_overrides(_file_stamp(PROMPT_OVERRIDES_FILE))
+
+
+def cached_next_run_number() -> int:
+    return _get_next_run_number(_file_stamp(RUN_STATE_FILE))
+
+
+def cached_result_files() -> list:
+    """Names of the saved result files, re-listed only when the results directory changes."""
+    return _list_result_files(_file_stamp(RESULTS_DIR))
+
+
+def cached_profiles(path: Path) -> list:
+    """Profiles under `path`, re-read only when a JSON file is added, removed or modified."""
+    stamp = tuple(
+        (str(json_file), _file_stamp(json_file)) for json_file in sorted(path.glob("**/*.json"))
+    )
+    return _load_profiles(str(path), stamp)
+
+
+@st.cache_resource(show_spinner=False)
+def _prompt_tuner(api_key: str | None) -> PromptTunerAgent:
+    return PromptTunerAgent(api_key=api_key)
 
 
 def init_session_state():
     st.session_state.setdefault("profiles", [])
+    # Bumped whenever `profiles` is replaced; `profiles_df_version` records which
+    # version the flattened `profiles_df` table was built from.
+    st.session_state.setdefault("profiles_version", 0)
+    st.session_state.setdefault("profiles_df", None)
+    st.session_state.setdefault("profiles_df_version", -1)
     st.session_state.setdefault("results_df", pd.DataFrame())
     st.session_state.setdefault("summary", {})
     st.session_state.setdefault("history_notes", "")
     st.session_state.setdefault("last_output_path", None)
-    st.session_state.setdefault("history_df", load_history_df())
-    st.session_state.setdefault("strategy_insights", load_strategy_insights())
-    st.session_state.setdefault("prompt_overrides", load_prompt_overrides())
-    st.session_state.setdefault("next_run_number", get_next_run_number())
+    # setdefault would evaluate (and read from disk) the default on every rerun
+    for key, loader in (
+        ("history_df", cached_history_df),
+        ("strategy_insights", cached_strategy_insights),
+        ("prompt_overrides", cached_prompt_overrides),
+        ("next_run_number", cached_next_run_number),
+    ):
+        if key not in st.session_state:
+            st.session_state[key] = loader()
     if not st.session_state.history_notes:
         st.session_state.history_notes = st.session_state.prompt_overrides.get("notes", "")
 
@@ -58,8 +170,12 @@ def ensure_api_key():
 
 def load_profiles_ui(profiles_path: Path):
     try:
-        profiles = load_profiles(profiles_path)
+        profiles = cached_profiles(profiles_path)
         st.session_state.profiles = profiles
+        st.session_state.profiles_version += 1
+        # Flattened here, at load time, rather than on every rerun of the table.
+        st.session_state.profiles_df = _profiles_table(profiles)
+        st.session_state.profiles_df_version = st.session_state.profiles_version
         st.success(f"{len(profiles)} perfiles cargados desde {profiles_path}")
     except FileNotFoundError:
         st.error(f"No se encontró el directorio {profiles_path}.")
@@ -79,34 +195,49 @@ def save_results(df: pd.DataFrame, summary: dict, run_number: int, output_name:
         "summary": summary,
         "records": df.to_dict(orient="records"),
     }
+    _write_json(path, payload)
+    return path
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    """Write `payload` as indented UTF-8 JSON (orjson when installed)."""
+    if orjson is not None:
+        # orjson writes NaN as null, which reloads as a missing value.
+        path.write_bytes(orjson.dumps(
+            payload,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        ))
+        return
     with path.open("w", encoding="utf-8") as handle:
         json.dump(payload, handle, ensure_ascii=False, indent=2)
-    return path
+
+
+def _read_json(path: Path) -> dict:
+    """Read a saved run; files with bare NaN (stdlib json output) fall back to `json`."""
+    raw = path.read_bytes()
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
 
 
 def load_results_file(path: Path):
     try:
-        with path.open("r", encoding="utf-8") as handle:
-            payload = json.load(handle)
+        payload = _read_json(path)
         df = pd.DataFrame(payload.get("records", []))
         summary = payload.get("summary", {})
         st.session_state.results_df = df
         st.session_state.summary = summary
         st.session_state.last_output_path = path
-        if not df.empty:
-            df_with_source = df.copy()
-            df_with_source["source_file"] = str(path)
-            df_with_source["run_saved_at"] = datetime.now().isoformat()
-        st.session_state.history_df = (
-            pd.concat([st.session_state.history_df, df_with_source], ignore_index=True)
-            .drop_duplicates(subset=["run_number", "client_id", "timestamp"], keep="last")
-        )
-        st.session_state.history_df = load_history_df()
-        st.session_state.strategy_insights = load_strategy_insights()
-        st.session_state.prompt_overrides = load_prompt_overrides()
+        # The persisted history is the source of truth for the history view
+        st.session_state.history_df = cached_history_df()
+        st.session_state.strategy_insights = cached_strategy_insights()
+        st.session_state.prompt_overrides = cached_prompt_overrides()
         st.success(f"Resultados cargados desde {path}")
         st.session_state.history_notes = st.session_state.prompt_overrides.get("notes", st.session_state.history_notes)
-        st.session_state.next_run_number = get_next_run_number()
+        st.session_state.next_run_number = cached_next_run_number()
     except FileNotFoundError:
         st.error(f"No se encontró el archivo {path}")
     except Exception as exc:
@@ -139,18 +270,12 @@ def run_experiment_ui(
     st.session_state.summary = summary
     output_path = save_results(df, summary, run_number, output_name)
     st.session_state.last_output_path = output_path
-    df_with_source = df.copy()
-    df_with_source["source_file"] = str(output_path)
-    df_with_source["run_saved_at"] = datetime.now().isoformat()
-    st.session_state.history_df = (
-        pd.concat([st.session_state.history_df, df_with_source], ignore_index=True)
-        .drop_duplicates(subset=["run_number", "client_id", "timestamp"], keep="last")
-    )
-    st.session_state.history_df = load_history_df()
-    st.session_state.strategy_insights = load_strategy_insights()
-    st.session_state.prompt_overrides = load_prompt_overrides()
+    # run_experiment already appended these records to the persisted history
+    st.session_state.history_df = cached_history_df()
+    st.session_state.strategy_insights = cached_strategy_insights()
+    st.session_state.prompt_overrides = cached_prompt_overrides()
     st.session_state.history_notes = st.session_state.prompt_overrides.get("notes", st.session_state.history_notes)
-    st.session_state.next_run_number = get_next_run_number()
+    st.session_state.next_run_number = cached_next_run_number()
     st.success(
         f"Experimento completado: {summary.get('n_conversations', 0)} conversaciones. "
         f"Guardado en {output_path}"
@@ -161,20 +286,35 @@ def show_profiles_table():
     if not st.session_state.profiles:
         st.info("Carga perfiles para visualizar.")
         return
-    df = pd.json_normalize(st.session_state.profiles)
-    display_cols = [
-        "customer_id",
-        "cohort.vocal",
-        "cohort.satisfied",
-        "persona.name",
-        "persona.bio",
-        "purchase.vehicle",
-        "purchase.price",
-        "risk_signals.churn_est",
-        "risk_signals.ltv_apriori",
-    ]
-    available_cols = [c for c in display_cols if c in df.columns]
-    st.dataframe(df[available_cols])
+    if st.session_state.profiles_df_version != st.session_state.profiles_version:
+        st.session_state.profiles_df = _profiles_table(st.session_state.profiles)
+        st.session_state.profiles_df_version = st.session_state.profiles_version
+    st.dataframe(st.session_state.profiles_df)
+
+
+_MISSING = object()
+
+
+def _get_nested(record: dict, dotted_key: str):
+    """Value at `dotted_key` ("a.b.c") in nested dicts, or `_MISSING`."""
+    value = record
+    for part in dotted_key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _profiles_table(profiles: list) -> pd.DataFrame:
+    """Table of the displayed columns only (columns no profile has are dropped)."""
+    # Pull just the displayed fields instead of json_normalize-ing every field
+    # and discarding most of them.
+    columns = {}
+    for key in PROFILE_TABLE_COLUMNS:
+        values = [_get_nested(profile, key) for profile in profiles]
+        if any(value is not _MISSING for value in values):
+            columns[key] = [np.nan if value is _MISSING else value for value in values]
+    return pd.DataFrame(columns)
 
 
 def show_results():
@@ -213,23 +353,44 @@ def render_filters(df: pd.DataFrame) -> pd.DataFrame:
     st.subheader("🎛️ Filtros")
 
     runs = sorted(df["run_number"].dropna().unique())
-    cohorts = sorted(df.get("cohort_label", pd.Series(dtype=str)).dropna().unique())
-    strategies = sorted(df.get("strategy_name", pd.Series(dtype=str)).dropna().unique())
+    # Most frequent first, so the useful options sit at the top of the dropdown.
+    cohorts = df.get("cohort_label", pd.Series(dtype=str)).value_counts().index.tolist()
+    strategies = df.get("strategy_name", pd.Series(dtype=str)).value_counts().index.tolist()
 
     col1, col2, col3 = st.columns(3)
-    selected_runs = col1.multiselect("Run number", runs, default=runs)
+    recent_runs = runs[-DEFAULT_RECENT_RUNS:]
+    masks = []
+    if len(runs) > MAX_RUN_MULTISELECT_OPTIONS:
+        # A multiselect with hundreds of options (all pre-selected) is slow to
+        # render; a range slider sends only the two endpoints.
+        first_run, last_run = col1.select_slider(
+            "Run number", options=runs, value=(recent_runs[0], recent_runs[-1])
+        )
+        if (first_run, last_run) != (runs[0], runs[-1]) or df["run_number"].hasnans:
+            masks.append(df["run_number"].between(first_run, last_run).to_numpy())
+        selected_runs = []
+    else:
+        selected_runs = col1.multiselect("Run number", runs, default=recent_runs)
     selected_cohorts = col2.multiselect("Cohorte", cohorts, default=cohorts)
     selected_strategies = col3.multiselect("Estrategia", strategies, default=strategies)
 
-    mask = pd.Series(True, index=df.index)
-    if selected_runs:
-        mask &= df["run_number"].isin(selected_runs)
-    if selected_cohorts:
-        mask &= df["cohort_label"].isin(selected_cohorts)
-    if selected_strategies:
-        mask &= df["strategy_name"].isin(selected_strategies)
+    for column, selected, options in (
+        ("run_number", selected_runs, runs),
+        ("cohort_label", selected_cohorts, cohorts),
+        ("strategy_name", selected_strategies, strategies),
+    ):
+        if not selected:
+            continue
+        values = df[column]
+        # Everything selected only filters out missing values; skip the
+        # membership test when there are none.
+        if len(selected) == len(options) and not values.hasnans:
+            continue
+        masks.append(values.isin(selected).to_numpy())
 
-    filtered = df[mask].copy()
+    # No defensive copy: boolean indexing already returns a new frame, and the
+    # tabs only read it (with no narrowing filter this is `df` itself).
+    filtered = df[np.logical_and.reduce(masks)] if masks else df
     st.caption(f"Mostrando {len(filtered)} conversaciones filtradas")
     return filtered
 
@@ -249,8 +410,13 @@ def show_summary_tab(df: pd.DataFrame, overall_summary: Dict):
     st.markdown("**Tabla de resultados filtrados**")
     st.dataframe(df, use_container_width=True)
 
-    csv_data = df.to_csv(index=False).encode("utf-8")
-    st.download_button("📥 Descargar CSV filtrado", data=csv_data, file_name="experiment_results.csv")
+    # Encoded only when the button is clicked (on a separate thread), not on
+    # every rerun.
+    st.download_button(
+        "📥 Descargar CSV filtrado",
+        data=lambda: df.to_csv(index=False).encode("utf-8"),
+        file_name="experiment_results.csv",
+    )
 
     if "strategy_name" in df.columns and "ganancia_LTV" in df.columns and not df.empty:
         strat_perf = df.groupby("strategy_name")["ganancia_LTV"].mean().sort_values(ascending=False)
@@ -260,20 +426,22 @@ def show_summary_tab(df: pd.DataFrame, overall_summary: Dict):
         )
 
         if "cohort_label" in df.columns:
-            rows = []
-            for cohort, cohort_df in df.groupby("cohort_label"):
-                perf = cohort_df.groupby("strategy_name")["ganancia_LTV"].mean().sort_values(ascending=False)
-                if not perf.empty:
-                    rows.append(
+            # One two-key groupby, then the best strategy of each cohort.
+            cohort_perf = (
+                df.groupby(["cohort_label", "strategy_name"], observed=True)["ganancia_LTV"].mean().dropna()
+            )
+            if not cohort_perf.empty:
+                best = cohort_perf.loc[cohort_perf.groupby(level=0).idxmax()]
+                st.markdown("**Mejor estrategia por cohorte (filtrado)**")
+                st.table(
+                    pd.DataFrame(
                         {
-                            "Cohorte": cohort,
-                            "Estrategia": perf.index[0],
-                            "Δ LTV": perf.iloc[0],
+                            "Cohorte": best.index.get_level_values(0),
+                            "Estrategia": best.index.get_level_values(1),
+                            "Δ LTV": best.to_numpy(),
                         }
                     )
-            if rows:
-                st.markdown("**Mejor estrategia por cohorte (filtrado)**")
-                st.table(pd.DataFrame(rows))
+                )
 
     if overall_summary:
         st.markdown("**Resumen general del último experimento**")
@@ -321,20 +489,21 @@ def show_conversations_tab(df: pd.DataFrame):
         return
 
     st.markdown("**Conversaciones**")
-    sorted_df = df.sort_values(["run_number", "client_id"]).reset_index(drop=True)
-    for _, row in sorted_df.iterrows():
-        transcript = row.get("transcript")
+    sorted_df = df.sort_values(["run_number", "client_id"])
+    # itertuples yields lightweight namedtuples instead of one Series per row
+    for row in sorted_df.itertuples(index=False):
+        transcript = getattr(row, "transcript", None)
         if not isinstance(transcript, list):
             continue
         header = (
-            f"Run {row['run_number']} · {row['client_id']} · {row['strategy_name']} · "
-            f"Reward {row['reward']:.3f}"
+            f"Run {row.run_number} · {row.client_id} · {row.strategy_name} · "
+            f"Reward {row.reward:.3f}"
         )
         with st.expander(header):
             st.markdown(
-                f"**Cohorte:** {row.get('cohort_label', 'N/D')} | "
-                f"**Costo:** ${row.get('costo_estrategia', 0):.0f} | "
-                f"**NPS reportado:** {row.get('nps_score_reported', 'N/D')}"
+                f"**Cohorte:** {getattr(row, 'cohort_label', 'N/D')} | "
+                f"**Costo:** ${getattr(row, 'costo_estrategia', 0):.0f} | "
+                f"**NPS reportado:** {getattr(row, 'nps_score_reported', 'N/D')}"
             )
             for turn in transcript:
                 role = turn.get("role", "")
@@ -344,8 +513,9 @@ def show_conversations_tab(df: pd.DataFrame):
                     continue
                 role_label = role.capitalize()
                 st.markdown(f"**{role_label}:** {content}")
-            if row.get("NPS_comment"):
-                st.caption(f"Comentario NPS: {row['NPS_comment']}")
+            nps_comment = getattr(row, "NPS_comment", None)
+            if nps_comment:
+                st.caption(f"Comentario NPS: {nps_comment}")
 
 
 def show_metrics_tab(df: pd.DataFrame):
@@ -363,6 +533,9 @@ def show_metrics_tab(df: pd.DataFrame):
     }
     agg.rename(columns=rename_map, inplace=True)
 
+    # Imported here, its only use, so the rest of the page never waits on plotly.
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=agg["run_number"],
@@ -437,10 +610,14 @@ def show_prompt_guidance(df: pd.DataFrame):
         st.markdown("**Guía generada automáticamente (último run)**")
         st.json(auto_guidance)
 
-    prompt_overrides = st.session_state.get("prompt_overrides", load_prompt_overrides())
+    prompt_overrides = (
+        st.session_state.prompt_overrides
+        if "prompt_overrides" in st.session_state
+        else cached_prompt_overrides()
+    )
 
     if st.button("🔁 Generar recomendaciones de prompt"):
-        tuner = PromptTunerAgent(api_key=os.getenv("OPENAI_API_KEY"))
+        tuner = _prompt_tuner(os.getenv("OPENAI_API_KEY"))
         guidance = tuner.run(
             run_records=df.to_dict(orient="records"),
             current_prompt_notes=st.session_state.history_notes,
@@ -449,8 +626,8 @@ def show_prompt_guidance(df: pd.DataFrame):
         save_prompt_overrides(prompt_overrides)
         st.session_state.prompt_overrides = prompt_overrides
         st.session_state.history_notes = prompt_overrides.get("notes", "")
-        st.session_state.strategy_insights = load_strategy_insights()
-        st.session_state.history_df = load_history_df()
+        st.session_state.strategy_insights = cached_strategy_insights()
+        st.session_state.history_df = cached_history_df()
         st.json(guidance)
 
     if st.session_state.history_notes:
@@ -471,7 +648,11 @@ def main():
         st.sidebar.text_input("Directorio de perfiles", str(DEFAULT_PROFILES_DIR))
     )
     max_profiles = st.sidebar.slider("Clientes a procesar", 1, 100, 20)
-    next_run_number = st.session_state.get("next_run_number", get_next_run_number())
+    next_run_number = (
+        st.session_state.next_run_number
+        if "next_run_number" in st.session_state
+        else cached_next_run_number()
+    )
     st.sidebar.markdown(f"Próximo run sugerido: **{next_run_number}**")
     max_turns = st.sidebar.slider("Turnos del agente proactivo", 3, 10, 4)
     concurrency = st.sidebar.slider("Conversaciones en paralelo", 1, 20, 8)
@@ -489,8 +670,7 @@ def main():
     if st.sidebar.button("📂 Cargar perfiles"):
         load_profiles_ui(profiles_dir)
 
-    saved_files = sorted(RESULTS_DIR.glob("*.json"))
-    options = ["(Selecciona archivo)"] + [f.name for f in saved_files]
+    options = ["(Selecciona archivo)"] + cached_result_files()
     selected_file = st.sidebar.selectbox("Resultados guardados", options)
     if st.sidebar.button("📥 Cargar resultados guardados", disabled=selected_file == "(Selecciona archivo)"):
         load_results_file(RESULTS_DIR / selected_file)
@@ -114,14 +114,19 @@ TEMPLATES = [
 ]
 
 
+# Built once at import: O(1) lookups for the per-message hot path.
+_TEMPLATE_BY_ID = {t.id: t for t in TEMPLATES}
+_TEMPLATE_IDS = tuple(_TEMPLATE_BY_ID)
+
+
 def get_template(template_id: str) -> Template:
     """Get template by ID."""
-    for template in TEMPLATES:
-        if template.id == template_id:
-            return template
-    raise ValueError(f"Template {template_id} not found")
+    try:
+        return _TEMPLATE_BY_ID[template_id]
+    except KeyError:
+        raise ValueError(f"Template {template_id} not found") from None
 
 
 def get_template_ids() -> list[str]:
     """Get list of all template IDs."""
-    return [t.id for t in TEMPLATES]
+    return list(_TEMPLATE_IDS)
@@ -3,6 +3,7 @@ Customer agent factory that generates deterministic personas from JSON profiles.
 """
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
 from typing import Dict, Optional
 
@@ -16,6 +17,41 @@ Usa variación natural en tu lenguaje, menciona detalles concretos de tu experie
 """
 
 
+# Customer system prompt; the *_block fields are optional sections that are
+# either empty or end in a blank line.
+_SYSTEM_PROMPT_TEMPLATE = (
+    CUSTOMER_SYSTEM_SEED.strip().replace("{", "{{").replace("}", "}}")
+    + """
+
+### Contexto personal
+- Nombre: {nombre}
+- Edad: {edad}
+- Ciudad: {ciudad}
+- Ocupación: {ocupacion}
+- Relación con Kavak: {relacion_kavak}
+
+### Historia revelada
+{historia_revelada}
+
+### Historia oculta
+{historia_oculta}
+
+### Sentimiento actual
+- Estado: {estado}
+
+{problema_block}{expectativa_block}{historial_block}{initial_context_block}{prompt_extra_block}\
+Responde siempre como cliente. Expresa necesidades, emociones y dudas. \
+No otorgues soluciones operativas ni confirmes acciones que dependen del equipo de Kavak."""
+)
+
+_INITIAL_CONTEXT_BLOCK = """\
+### Expectativas expresadas en registros previos
+{initial_context}
+Utiliza esta referencia para responder de forma natural. No la cites ni la repitas textualmente en tus mensajes.
+
+"""
+
+
 @dataclass
 class CustomerAgent:
     """In-memory representation of a customer simulation agent."""
@@ -58,8 +94,9 @@ def _extract_persona(profile: Dict) -> Dict:
     if isinstance(human, dict):
         return human
 
-    persona = profile.get("persona", {})
+    persona = profile.get("persona")
     if persona:
+        cohort = profile.get("cohort") or {}
         return {
             "nombre": persona.get("name"),
             "edad": persona.get("age"),
@@ -67,8 +104,8 @@ def _extract_persona(profile: Dict) -> Dict:
             "ocupacion": persona.get("occupation"),
             "historia_revelada": persona.get("bio"),
             "historia_oculta": persona.get("bio"),
-            "es_vocal": profile.get("cohort", {}).get("vocal", False),
-            "satisfaccion": "Satisfecho" if profile.get("cohort", {}).get("satisfied", True) else "Insatisfecho",
+            "es_vocal": cohort.get("vocal", False),
+            "satisfaccion": "Satisfecho" if cohort.get("satisfied", True) else "Insatisfecho",
             "problema": "",
             "expectativa_solucion": "",
             "prompt_conversacional": "",
@@ -77,66 +114,79 @@ def _extract_persona(profile: Dict) -> Dict:
 
 
 def _build_system_prompt(persona: Dict, profile: Dict) -> str:
-    """Compose deterministic system prompt for the customer."""
-    lines = [
-        CUSTOMER_SYSTEM_SEED.strip(),
-        "",
-        "### Contexto personal",
-        f"- Nombre: {persona.get('nombre', 'Cliente Kavak')}",
-        f"- Edad: {persona.get('edad', 'N/D')}",
-        f"- Ciudad: {persona.get('ciudad', 'N/D')}",
-        f"- Ocupación: {persona.get('ocupacion', 'N/D')}",
-        f"- Relación con Kavak: {persona.get('relacion_kavak', profile.get('purchase', {}).get('vehicle', 'cliente'))}",
-        "",
-        "### Historia revelada",
-        persona.get("historia_revelada", "Sin historial detallado."),
-        "",
-        "### Historia oculta",
-        persona.get("historia_oculta", "Sin detalles adicionales."),
-        "",
-        "### Sentimiento actual",
-        f"- Estado: {'Satisfecho' if profile.get('cohort', {}).get('satisfied', True) else 'Insatisfecho'}",
-        "",
-    ]
-
-    problema = persona.get("problema")
-    if problema:
-        lines.extend(["### Problema principal", problema, ""])
-
-    expectativa = persona.get("expectativa_solucion")
-    if expectativa:
-        lines.extend(["### Expectativa de solución", expectativa, ""])
+    """
+    Compose deterministic system prompt for the customer.
 
+    Only the fields below shape the prompt, so the rendered text is memoized
+    on them; profiles sharing a persona reuse one string.
+    """
     historial = persona.get("historial_vocalidad") or []
-    if historial:
-        lines.append("### Historial de vocalidad relevante")
-        for registro in historial[:3]:
-            canal = registro.get("canal", "canal")
-            resumen = registro.get("resumen", "")
-            nps_reg = registro.get("nps")
-            suffix = f" (NPS {nps_reg})" if nps_reg is not None else ""
-            lines.append(f"- {canal}: {resumen}{suffix}")
-        lines.append("")
-
-    initial_context = profile.get("_initial_customer_message")
-    if initial_context:
-        lines.extend([
-            "### Expectativas expresadas en registros previos",
-            initial_context,
-            "Utiliza esta referencia para responder de forma natural. No la cites ni la repitas textualmente en tus mensajes.",
-            "",
-        ])
-
-    prompt_extra = persona.get("prompt_conversacional")
-    if prompt_extra:
-        lines.extend(["### Instrucciones específicas", prompt_extra, ""])
-
-    lines.append(
-        "Responde siempre como cliente. Expresa necesidades, emociones y dudas. "
-        "No otorgues soluciones operativas ni confirmes acciones que dependen del equipo de Kavak."
+    fields = (
+        persona.get("nombre", "Cliente Kavak"),
+        persona.get("edad", "N/D"),
+        persona.get("ciudad", "N/D"),
+        persona.get("ocupacion", "N/D"),
+        persona.get("relacion_kavak", profile.get("purchase", {}).get("vehicle", "cliente")),
+        persona.get("historia_revelada", "Sin historial detallado."),
+        persona.get("historia_oculta", "Sin detalles adicionales."),
+        profile.get("cohort", {}).get("satisfied", True),
+        persona.get("problema"),
+        persona.get("expectativa_solucion"),
+        tuple(
+            (registro.get("canal", "canal"), registro.get("resumen", ""), registro.get("nps"))
+            for registro in historial[:3]
+        ),
+        profile.get("_initial_customer_message"),
+        persona.get("prompt_conversacional"),
     )
-
-    return "\n".join(lines).strip()
+    try:
+        return _render_system_prompt(*fields)
+    except TypeError:  # an unhashable field value; render without the cache
+        return _render_system_prompt.__wrapped__(*fields)
+
+
+@functools.lru_cache(maxsize=1024)
+def _render_system_prompt(
+    nombre,
+    edad,
+    ciudad,
+    ocupacion,
+    relacion_kavak,
+    historia_revelada,
+    historia_oculta,
+    satisfecho,
+    problema,
+    expectativa,
+    historial: tuple,
+    initial_context,
+    prompt_extra,
+) -> str:
+    # Optional sections are rendered up front (empty when absent) and
+    # dropped into one template, instead of growing and joining a line list.
+    historial_block = ""
+    if historial:
+        historial_block = "### Historial de vocalidad relevante\n" + "".join(
+            f"- {canal}: {resumen}{f' (NPS {nps_reg})' if nps_reg is not None else ''}\n"
+            for canal, resumen, nps_reg in historial
+        ) + "\n"
+
+    return _SYSTEM_PROMPT_TEMPLATE.format(
+        nombre=nombre,
+        edad=edad,
+        ciudad=ciudad,
+        ocupacion=ocupacion,
+        relacion_kavak=relacion_kavak,
+        historia_revelada=historia_revelada,
+        historia_oculta=historia_oculta,
+        estado="Satisfecho" if satisfecho else "Insatisfecho",
+        problema_block=f"### Problema principal\n{problema}\n\n" if problema else "",
+        expectativa_block=f"### Expectativa de solución\n{expectativa}\n\n" if expectativa else "",
+        historial_block=historial_block,
+        initial_context_block=(
+            _INITIAL_CONTEXT_BLOCK.format(initial_context=initial_context) if initial_context else ""
+        ),
+        prompt_extra_block=f"### Instrucciones específicas\n{prompt_extra}\n\n" if prompt_extra else "",
+    ).strip()
 
 
 def _initial_customer_message(profile: Dict, persona: Dict) -> Optional[str]:
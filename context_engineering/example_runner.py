@@ -11,7 +11,12 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from app.HumanSimulacra.schemas import Persona
+try:  # Optional: faster profile parsing (pip install orjson)
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+from app.HumanSimulacra.schemas import PERSONA_ADAPTER
 from app.factories.judge import Judge
 
 from .agents_factory import CustomerAgentFactory
@@ -27,8 +32,11 @@ def load_profiles(path: Path) -> List[dict]:
     profiles: List[dict] = []
     json_paths = sorted(path.glob("**/*.json"))
     for json_file in json_paths:
-        with json_file.open("r", encoding="utf-8") as f:
-            payload = json.load(f)
+        if orjson is not None:
+            payload = orjson.loads(json_file.read_bytes())
+        else:
+            with json_file.open("r", encoding="utf-8") as f:
+                payload = json.load(f)
 
         if _is_persona_payload(payload):
             persona_profile = persona_to_profile(payload, customer_id=json_file.stem)
@@ -37,7 +45,7 @@ def load_profiles(path: Path) -> List[dict]:
 
         persona_payload = payload.get("human_simulacra")
         if persona_payload:
-            persona_obj = Persona(**persona_payload)
+            persona_obj = PERSONA_ADAPTER.validate_python(persona_payload)
             payload["human_simulacra"] = persona_obj.model_dump(mode="python")
 
         profiles.append(payload)
@@ -104,27 +112,28 @@ def run_iteration(
     records: Dict[int, dict] = {}
     logs: Dict[int, List[str]] = {} if include_logs else {}
 
-    if concurrency <= 1:
-        config["planner_instance"] = planner or PlannerAgent(api_key=api_key, model=planner_model)
-        config["factory_instance"] = CustomerAgentFactory()
-        config["orchestrator_instance"] = ProactiveConversationAgent(
-            api_key=api_key,
-            proactive_model=proactive_model,
-            customer_model=customer_model,
-        )
-        config["judge_instance"] = Judge(api_key=api_key, model=judge_model)
+    # The agents keep no per-conversation state (their runners' clients and
+    # caches are thread-safe), so one set serves every worker thread.
+    config["planner_instance"] = planner or PlannerAgent(api_key=api_key, model=planner_model)
+    config["factory_instance"] = CustomerAgentFactory()
+    config["orchestrator_instance"] = ProactiveConversationAgent(
+        api_key=api_key,
+        proactive_model=proactive_model,
+        customer_model=customer_model,
+    )
+    config["judge_instance"] = Judge(api_key=api_key, model=judge_model)
 
+    if concurrency <= 1:
         for idx, profile in indexed_profiles:
-            idx_out, record, log_lines = _process_profile(idx, profile, config, reuse_agents=True)
+            idx_out, record, log_lines = _process_profile(idx, profile, config)
             if include_logs:
                 logs[idx_out] = log_lines
             if record:
                 records[idx_out] = record
     else:
-        config["planner_instance"] = None
         with ThreadPoolExecutor(max_workers=concurrency) as executor:
             futures = {
-                executor.submit(_process_profile, idx, profile, config, False): idx
+                executor.submit(_process_profile, idx, profile, config): idx
                 for idx, profile in indexed_profiles
             }
             for future in as_completed(futures):
@@ -276,18 +285,10 @@ def _process_profile(
     idx: int,
     profile: Dict,
     config: Dict[str, Optional[object]],
-    reuse_agents: bool,
 ) -> Tuple[int, Optional[dict], List[str]]:
     log_lines: List[str] = []
     try:
-        planner: PlannerAgent
-        if reuse_agents:
-            planner = config["planner_instance"]  # type: ignore[assignment]
-        else:
-            planner = PlannerAgent(
-                api_key=config.get("api_key"),
-                model=config.get("planner_model", "gpt-4.1"),  # type: ignore[arg-type]
-            )
+        planner: PlannerAgent = config["planner_instance"]  # type: ignore[assignment]
 
         plan = _resolve_plan(
             profile=profile,
@@ -302,21 +303,9 @@ def _process_profile(
             history_notes=config.get("history_notes"),  # type: ignore[arg-type]
         )
 
-        if reuse_agents:
-            factory: CustomerAgentFactory = config["factory_instance"]  # type: ignore[assignment]
-            orchestrator: ProactiveConversationAgent = config["orchestrator_instance"]  # type: ignore[assignment]
-            judge: Judge = config["judge_instance"]  # type: ignore[assignment]
-        else:
-            factory = CustomerAgentFactory()
-            orchestrator = ProactiveConversationAgent(
-                api_key=config.get("api_key"),
-                proactive_model=config.get("proactive_model", "gpt-4.1"),  # type: ignore[arg-type]
-                customer_model=config.get("customer_model", "gpt-4.1-mini"),  # type: ignore[arg-type]
-            )
-            judge = Judge(
-                api_key=config.get("api_key"),
-                model=config.get("judge_model", "gpt-4.1-mini"),  # type: ignore[arg-type]
-            )
+        factory: CustomerAgentFactory = config["factory_instance"]  # type: ignore[assignment]
+        orchestrator: ProactiveConversationAgent = config["orchestrator_instance"]  # type: ignore[assignment]
+        judge: Judge = config["judge_instance"]  # type: ignore[assignment]
 
         strategy_def = get_strategy(plan.strategy_id)
 
@@ -5,8 +5,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
-from app.HumanSimulacra.schemas import Persona
-
+from app.HumanSimulacra.schemas import PERSONA_ADAPTER
 from app.models import Context
 
 
@@ -113,7 +112,7 @@ def persona_to_profile(persona_payload: Dict[str, Any], *, customer_id: Optional
     Convert a persona JSON (as generated in personas_output) into the profile
     structure expected by the context-engineering pipeline.
     """
-    persona = Persona.model_validate(persona_payload)
+    persona = PERSONA_ADAPTER.validate_python(persona_payload)
 
     segment_map = {
         True: {True: "VF", False: "VE"},